@@ -0,0 +1,112 @@
+# process-wide asset registry shared by level, cube, text, sound and menu
+import threading
+from collections import OrderedDict
+import pygame
+from utils import svg_to_surface
+from constants import ASSET_MEMORY_BUDGET
+
+
+def surface_bytes(surface):
+    return surface.get_pitch() * surface.get_height()
+
+
+def sound_bytes(sound):
+    init = pygame.mixer.get_init()
+    if not init:
+        return 0
+    frequency, fmt, channels = init
+    return int(sound.get_length() * frequency) * (abs(fmt) // 8) * channels
+
+
+class AssetRegistry:
+    """Deduplicates surfaces, sounds, fonts and derived data by key.
+
+    Every loaded asset is recorded with its approximate size in bytes; once
+    the total exceeds `budget_bytes` the least recently used entries are
+    dropped. Callers that still hold a reference keep their copy, later
+    requests simply load it again.
+    """
+
+    def __init__(self, budget_bytes=ASSET_MEMORY_BUDGET):
+        self.budget_bytes = budget_bytes
+        self._entries = OrderedDict()  # key -> (asset, nbytes)
+        self._total_bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, loader, sizer=None):
+        """Return the asset stored under `key`, calling `loader()` on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        # Load outside the lock so a slow rasterisation doesn't block other
+        # threads; if two threads race, the first stored copy wins.
+        asset = loader()
+        nbytes = sizer(asset) if sizer and asset is not None else 0
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+            self._entries[key] = (asset, nbytes)
+            self._total_bytes += nbytes
+            self._evict()
+        return asset
+
+    def surface(self, path, width=None, height=None, scale_mode="contain"):
+        """Rasterised SVG surface, shared by every caller asking for the same size."""
+        return self.get(
+            ("surface", path, width, height, scale_mode),
+            lambda: svg_to_surface(path, width=width, height=height, scale_mode=scale_mode),
+            surface_bytes,
+        )
+
+    def sound(self, path):
+        return self.get(("sound", path), lambda: pygame.mixer.Sound(path), sound_bytes)
+
+    def font(self, name, size):
+        return self.get(("font", name, size), lambda: pygame.font.SysFont(name, size))
+
+    def discard(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _evict(self):
+        # Never evict the entry that was just added.
+        while self._total_bytes > self.budget_bytes and len(self._entries) > 1:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._total_bytes -= nbytes
+
+    @property
+    def total_bytes(self):
+        return self._total_bytes
+
+    def report(self):
+        """Return ``[(key, nbytes), ...]`` sorted from largest to smallest."""
+        with self._lock:
+            items = [(key, nbytes) for key, (_, nbytes) in self._entries.items()]
+        return sorted(items, key=lambda item: item[1], reverse=True)
+
+    def print_report(self):
+        for key, nbytes in self.report():
+            print(f"{nbytes / 1024:10.1f} KiB  {key}")
+        print(f"{self._total_bytes / (1024 * 1024):10.1f} MiB total "
+              f"(budget {self.budget_bytes / (1024 * 1024):.0f} MiB), "
+              f"{self.hits} hits, {self.misses} misses")
+
+
+registry = AssetRegistry()
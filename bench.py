@@ -0,0 +1,379 @@
+# benchmark suite for the engine hot paths, headless via SDL's dummy drivers
+#   python bench.py              run and compare against bench_baseline.json
+#   python bench.py --save       run and store the results as the new baseline
+#   python bench.py -k collide   only run benchmarks whose name contains "collide"
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import glyphs
+import levelfile
+import raster_cache
+from assets import registry
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, PHYSICS_TICK_RATE, PARTICLE_BUDGET
+from cube import Cube, Inputs
+from level import Level
+from menu import LevelMenu
+from particles import ParticleSystem
+from render import DirtyRenderer
+from resolution import QUALITY_SCALES, ResolutionScaler
+from text import IntroText
+from utils import svg_to_surface
+
+BASELINE_PATH = "bench_baseline.json"
+DEFAULT_THRESHOLD = 0.20  # flag anything 20% slower than its baseline
+
+_benchmarks = []
+
+
+def benchmark(name):
+    """Register `setup` under `name`; setup() returns the callable to time."""
+    def register(setup):
+        _benchmarks.append((name, setup))
+        return setup
+    return register
+
+
+def time_call(fn, min_time=0.05, repeats=5):
+    """Return the best per-call time in ms, calibrating the call count first."""
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000.0
+
+
+# -- rasterisation ----------------------------------------------------------
+
+def _svg_benchmarks():
+    for path in sorted(glob.glob("assets/**/*.svg", recursive=True)):
+        size = (50, 50) if path.endswith("player.svg") else (SCREEN_WIDTH, SCREEN_HEIGHT)
+        for mode in ("contain", "cover", "fill"):
+            def setup(path=path, size=size, mode=mode):
+                raster_cache.enabled = False
+                return lambda: svg_to_surface(path, *size, scale_mode=mode)
+            benchmark(f"svg_to_surface {path} {mode}")(setup)
+
+    @benchmark("svg_to_surface raster cache hit")
+    def _():
+        path = "assets/Levels/Level1.svg"
+        raster_cache.enabled = True
+        svg_to_surface(path, SCREEN_WIDTH, SCREEN_HEIGHT, scale_mode="fill")
+        return lambda: svg_to_surface(path, SCREEN_WIDTH, SCREEN_HEIGHT, scale_mode="fill")
+
+
+_svg_benchmarks()
+
+
+# -- level ------------------------------------------------------------------
+
+@benchmark("Level.__init__ rasterised")
+def _():
+    # Every layer from its SVG: no compiled level, raster cache or registry.
+    raster_cache.enabled = False
+    levelfile.enabled = False
+
+    def build():
+        registry.clear()
+        Level("assets/Levels/Level1.svg", level_number=1)
+    return build
+
+
+@benchmark("Level.__init__ compiled")
+def _():
+    if levelfile.load(1) is None:
+        raise FileNotFoundError("no fresh compiled level 1; run compile_levels.py")
+
+    def build():
+        registry.clear()
+        Level("assets/Levels/Level1.svg", level_number=1)
+    return build
+
+
+@benchmark("Level.__init__ shared assets")
+def _():
+    Level("assets/Levels/Level1.svg", level_number=1)
+    return lambda: Level("assets/Levels/Level1.svg", level_number=1)
+
+
+def _random_rects(count=1000, seed=1):
+    rng = random.Random(seed)
+    return [pygame.Rect(rng.randrange(-50, SCREEN_WIDTH), rng.randrange(-50, SCREEN_HEIGHT), 50, 50)
+            for _ in range(count)]
+
+
+@benchmark("Level.get_collisions x1000 random rects")
+def _():
+    level = Level("assets/Levels/Level1.svg", level_number=1)
+    rects = _random_rects()
+    return lambda: [level.get_collisions(rect) for rect in rects]
+
+
+@benchmark("Level.touching_spikes x1000 random rects")
+def _():
+    level = Level("assets/Levels/Level1.svg", level_number=1)
+    rects = _random_rects()
+    return lambda: [level.touching_spikes(rect) for rect in rects]
+
+
+@benchmark("Level.sense x1000 random rects")
+def _():
+    level = Level("assets/Levels/Level1.svg", level_number=1)
+    rects = _random_rects()
+    return lambda: [level.sense(rect) for rect in rects]
+
+
+# -- cube -------------------------------------------------------------------
+
+def _cube_update_benchmarks():
+    for vx, vy in ((0, 0), (400, 0), (400, -900), (4000, 4000), (40000, -40000)):
+        def setup(vx=vx, vy=vy):
+            level = Level("assets/Levels/Level1.svg", level_number=1)
+            cube = Cube(100, 300, headless=True)
+
+            def step():
+                cube.teleport(100, 300)
+                cube.velocity_x = vx
+                cube.velocity_y = vy
+                cube.update(1 / PHYSICS_TICK_RATE, level)
+            return step
+        benchmark(f"Cube.update v=({vx},{vy})")(setup)
+
+
+_cube_update_benchmarks()
+
+
+@benchmark("Cube.draw full trail")
+def _():
+    screen = pygame.display.get_surface()
+    cube = Cube(100, 300)
+    for i in range(cube.max_trail_length):
+        cube.trail.append(100 + i * 7, 300 + i * 3)
+    return lambda: cube.draw(screen)
+
+
+@benchmark("Cube.draw 500-sample trail")
+def _():
+    screen = pygame.display.get_surface()
+    cube = Cube(100, 300)
+    cube.max_trail_length = 500
+    cube.trail.resize(500)
+    for i in range(500):
+        cube.trail.append(100 + i * 3, 300 + i)
+    return lambda: cube.draw(screen)
+
+
+# -- particles ----------------------------------------------------------------
+
+def _particle_burst(count):
+    system = ParticleSystem(seed=1)
+    while len(system) < count:
+        system.emit(960, 300, 1000, speed=(50, 900), life=(100, 100), spread=400)
+    return system
+
+
+@benchmark("ParticleSystem.update full budget")
+def _():
+    level = Level("assets/Levels/Level1.svg", level_number=1)
+    system = _particle_burst(PARTICLE_BUDGET)
+    system.gravity = 0
+    return lambda: system.update(0, *level.tile_window())
+
+
+@benchmark("ParticleSystem.draw 5k")
+def _():
+    screen = pygame.display.get_surface()
+    system = _particle_burst(5_000)
+    return lambda: system.draw(screen)
+
+
+@benchmark("ParticleSystem.draw full budget")
+def _():
+    screen = pygame.display.get_surface()
+    system = _particle_burst(PARTICLE_BUDGET)
+    return lambda: system.draw(screen)
+
+
+# -- text ---------------------------------------------------------------------
+
+@benchmark("HUD fps counter (glyph atlas)")
+def _():
+    screen = pygame.display.get_surface()
+    digits = glyphs.small_digits(scale=4, color=(255, 0, 0))
+    return lambda: digits.draw(screen, "165", (14, 8))
+
+
+@benchmark("LevelMenu.draw")
+def _():
+    screen = pygame.display.get_surface()
+    menu = LevelMenu()
+    return lambda: menu.draw(screen)
+
+
+@benchmark("IntroText.draw mid-fade")
+def _():
+    screen = pygame.display.get_surface()
+    intro = IntroText("assets/Text/Text.svg")
+    intro.update(2.5)
+    return lambda: intro.draw(screen)
+
+
+# -- full frame ---------------------------------------------------------------
+
+@benchmark("frame pipeline (index.py, dirty rects)")
+def _():
+    screen = pygame.display.get_surface()
+    level = Level("assets/Levels/Level1.svg", level_number=1)
+    cube = Cube(100, 0)
+    intro = IntroText("assets/Text/Text.svg")
+    hud = glyphs.small_digits(scale=4, color=(255, 0, 0))
+    renderer = DirtyRenderer(screen)
+    hold_right = Inputs(False, True, False, False)
+    ticks_per_frame = max(1, round(PHYSICS_TICK_RATE / 165))
+
+    def frame():
+        pygame.event.pump()
+        for _ in range(ticks_per_frame):
+            cube.apply_input(*hold_right, level=level)
+            if cube.update(1 / PHYSICS_TICK_RATE, level):
+                cube.teleport(100, 0)
+        intro.update(1 / 165)
+        renderer.set_background(level.compose_static(1))
+        renderer.begin_frame()
+        renderer.mark(cube.draw(screen))
+        renderer.mark(intro.draw(screen))
+        renderer.mark(hud.draw(screen, "165", (14, 8)))
+        renderer.present()
+    return frame
+
+
+@benchmark("frame pipeline (full redraw + flip)")
+def _():
+    screen = pygame.display.get_surface()
+    level = Level("assets/Levels/Level1.svg", level_number=1)
+    cube = Cube(100, 0)
+    intro = IntroText("assets/Text/Text.svg")
+    hud = glyphs.small_digits(scale=4, color=(255, 0, 0))
+    hold_right = Inputs(False, True, False, False)
+    ticks_per_frame = max(1, round(PHYSICS_TICK_RATE / 165))
+
+    def frame():
+        pygame.event.pump()
+        for _ in range(ticks_per_frame):
+            cube.apply_input(*hold_right, level=level)
+            if cube.update(1 / PHYSICS_TICK_RATE, level):
+                cube.teleport(100, 0)
+        intro.update(1 / 165)
+        level.draw_background(screen)
+        level.draw_spikes(screen, 1)
+        level.draw(screen)
+        cube.draw(screen)
+        intro.draw(screen)
+        hud.draw(screen, "165", (14, 8))
+        pygame.display.flip()
+    return frame
+
+
+def _scaled_frame_benchmarks():
+    for level_index, scale in enumerate(QUALITY_SCALES[1:], start=1):
+        def setup(level_index=level_index, scale=scale):
+            screen = pygame.display.get_surface()
+            level = Level("assets/Levels/Level1.svg", level_number=1)
+            cube = Cube(100, 0)
+            scaler = ResolutionScaler()
+            scaler.level = level_index
+
+            def frame():
+                world = scaler.target(screen)
+                world.blit(level.compose_static(1, True, scale), (0, 0))
+                cube.draw(world, 1.0, (0, 0), scale)
+                scaler.upscale(world, screen)
+                pygame.display.flip()
+            return frame
+        benchmark(f"frame pipeline (world at {scale:g}x, upscaled)")(setup)
+
+
+_scaled_frame_benchmarks()
+
+
+# -- runner -------------------------------------------------------------------
+
+def run(name_filter=None):
+    results = {}
+    for name, setup in _benchmarks:
+        if name_filter and name_filter not in name:
+            continue
+        cache_enabled = raster_cache.enabled, levelfile.enabled
+        try:
+            results[name] = time_call(setup())
+            print(f"{results[name]:12.4f} ms  {name}")
+        except Exception as e:
+            print(f"{'skipped':>15}  {name}: {type(e).__name__}: {e}")
+        finally:
+            raster_cache.enabled, levelfile.enabled = cache_enabled
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print changes against `baseline`; return the names that regressed."""
+    regressions = []
+    for name, ms in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = (ms - base) / base
+        if change > threshold:
+            regressions.append(name)
+            print(f"REGRESSION {change:+7.1%}  {name} ({base:.4f} -> {ms:.4f} ms)")
+        elif change < -threshold:
+            print(f"improved   {change:+7.1%}  {name} ({base:.4f} -> {ms:.4f} ms)")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the engine hot paths.")
+    parser.add_argument("-k", dest="name_filter", help="only run benchmarks whose name contains this")
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression (default 0.20)")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    results = run(args.name_filter)
+
+    if args.save:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Saved {len(results)} results to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
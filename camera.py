@@ -0,0 +1,37 @@
+# viewport into levels larger than the screen
+import pygame
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+
+
+class Camera:
+    """Screen-sized window onto the world, kept centred on a target and
+    clamped to the level bounds. For screen-sized levels it never moves."""
+
+    def __init__(self, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.width = width
+        self.height = height
+        self.world_width = width
+        self.world_height = height
+        self.x = 0
+        self.y = 0
+
+    def set_world(self, world_width, world_height):
+        self.world_width = world_width
+        self.world_height = world_height
+        self.x = 0
+        self.y = 0
+
+    def follow(self, target_x, target_y):
+        """Centre on (target_x, target_y) as far as the world bounds allow."""
+        self.x = int(max(0, min(target_x - self.width / 2, self.world_width - self.width)))
+        self.y = int(max(0, min(target_y - self.height / 2, self.world_height - self.height)))
+
+    @property
+    def offset(self):
+        """World-to-screen translation: screen = world - offset."""
+        return self.x, self.y
+
+    @property
+    def rect(self):
+        """The visible part of the world."""
+        return pygame.Rect(self.x, self.y, self.width, self.height)
@@ -0,0 +1,357 @@
+# scrolling levels, rasterised and collided in fixed-size chunks around the camera
+import os
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pygame
+from assets import registry
+from collision import CollisionMap, Contacts, UNBOUNDED, SOLID, HAZARD, GOAL, solid_from_surface
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, LEVEL_CHUNK_SIZE, LEVEL_CHUNK_CACHE
+from level import LEVEL_LAYER, SPIKES_LAYER, BACKGROUND_LAYER, GOAL_LAYER
+from profiler import profiler
+from utils import svg_region_to_surface, svg_size
+
+# Collision queries read a tile window assembled from chunks that reaches
+# this far either side of the queried box; sweeps look SWEEP_RANGE ahead,
+# far more than anything moves in one physics tick.
+WINDOW_MARGIN = 256
+SWEEP_RANGE = WINDOW_MARGIN // 2
+
+Chunk = namedtuple("Chunk", "rect surface tiles")
+# The optional layers chunks are composited from (paths are None when absent).
+ChunkLayers = namedtuple("ChunkLayers", "spikes_path goal_path bg_image")
+# Chunks rebuilt after a layer file changed, with the layers they used.
+ChunkUpdate = namedtuple("ChunkUpdate", "layers chunks")
+
+# One worker shared by every chunked level, created on first use.
+_executor = None
+
+
+def _stream_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunk-stream")
+    return _executor
+
+
+def world_size(svg_path):
+    """Size of a level SVG scaled to the screen height, or None if unknown."""
+    intrinsic = svg_size(svg_path)
+    if not intrinsic:
+        return None
+    w, h = intrinsic
+    return int(round(w * SCREEN_HEIGHT / h)), SCREEN_HEIGHT
+
+
+def is_scrolling(svg_path):
+    """True if the level is wider than the screen at the screen's height."""
+    size = world_size(svg_path)
+    return size is not None and size[0] > SCREEN_WIDTH
+
+
+class ChunkedLevel:
+    """A level many screens wide, drawn and collided through square chunks.
+
+    The SVG is scaled to the screen height. Each chunk holds the composited
+    background, spikes and level pixels of its square plus their tile bits
+    (the same SOLID/HAZARD/GOAL bits as CollisionMap). Chunks are built when
+    first needed, or ahead of the camera on a worker by stream(), and the
+    least recently used are dropped past `max_chunks`, so memory stays
+    bounded however long the level is.
+
+    Collision queries have Level's interface and run against a tile window
+    assembled from the chunks around the queried box.
+    """
+
+    scrolls = True
+
+    def __init__(self, svg_path, level_number, chunk_size=LEVEL_CHUNK_SIZE, max_chunks=LEVEL_CHUNK_CACHE):
+        self.svg_path = svg_path
+        self.level_number = level_number
+        self.width, self.height = world_size(svg_path)
+        self.bounds = pygame.Rect(0, 0, self.width, self.height)
+        self.chunk_size = chunk_size
+        # stream() keeps a screen plus one chunk either side loaded; never
+        # evict below that or chunks would be rebuilt every frame.
+        streamed = ((SCREEN_WIDTH // chunk_size + 4) * (SCREEN_HEIGHT // chunk_size + 2))
+        self.max_chunks = max(max_chunks, streamed)
+
+        spikes_path = f"assets/Obstacles/Spikes{level_number}.svg"
+        goal_path = f"assets/Goals/Goal{level_number}.svg"
+        self.spikes_path = spikes_path if os.path.exists(spikes_path) else None
+        self.goal_path = goal_path if os.path.exists(goal_path) else None
+        try:
+            self.bg_image = registry.surface("assets/Backgrounds/bg.svg", width=SCREEN_WIDTH, height=SCREEN_HEIGHT, scale_mode="fill")
+        except Exception:
+            self.bg_image = None
+
+        self._chunks = OrderedDict()  # (cx, cy) -> Chunk
+        self._scaled = OrderedDict()  # (cx, cy, scale) -> downscaled chunk surface
+        self._pending = {}  # (cx, cy) -> Future[Chunk]
+        self._window = pygame.Rect(0, 0, 0, 0)
+        self._window_tiles = np.zeros((0, 0), dtype=np.uint8)
+        self._view = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+        # Bumped by apply_layer(), like CollisionMap.revision.
+        self.revision = 0
+
+    # -- chunks ---------------------------------------------------------------
+
+    def _keys_in(self, rect):
+        rect = rect.clip(self.bounds)
+        if not rect.width or not rect.height:
+            return []
+        size = self.chunk_size
+        return [(cx, cy)
+                for cy in range(rect.top // size, (rect.bottom - 1) // size + 1)
+                for cx in range(rect.left // size, (rect.right - 1) // size + 1)]
+
+    def _chunk(self, key):
+        chunk = self._chunks.get(key)
+        if chunk is not None:
+            self._chunks.move_to_end(key)
+            return chunk
+
+        future = self._pending.pop(key, None)
+        chunk = future.result() if future is not None else self._build(*key)
+        self._chunks[key] = chunk
+        while len(self._chunks) > self.max_chunks:
+            self._chunks.popitem(last=False)
+        return chunk
+
+    def _build(self, cx, cy, layers=None):
+        if layers is None:
+            layers = ChunkLayers(self.spikes_path, self.goal_path, self.bg_image)
+        size = self.chunk_size
+        rect = pygame.Rect(cx * size, cy * size, size, size).clip(self.bounds)
+        world = (self.width, self.height)
+        region = tuple(rect)
+
+        image = svg_region_to_surface(self.svg_path, world, region)
+        tiles = solid_from_surface(image).astype(np.uint8) * np.uint8(SOLID)
+        spikes = None
+        if layers.spikes_path:
+            spikes = svg_region_to_surface(layers.spikes_path, world, region)
+            tiles[solid_from_surface(spikes)] |= HAZARD
+        if layers.goal_path:
+            tiles[solid_from_surface(svg_region_to_surface(layers.goal_path, world, region))] |= GOAL
+        elif rect.right == self.width:
+            # Without a goal layer the level's last column is the exit.
+            tiles[:, -1] |= GOAL
+
+        surface = pygame.Surface(rect.size)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.fill((0, 0, 0))
+        if layers.bg_image:
+            # The screen-sized background repeats along the level.
+            bg_w, bg_h = layers.bg_image.get_size()
+            for y in range(rect.top - rect.top % bg_h, rect.bottom, bg_h):
+                for x in range(rect.left - rect.left % bg_w, rect.right, bg_w):
+                    surface.blit(layers.bg_image, (x - rect.left, y - rect.top))
+        if spikes:
+            surface.blit(spikes, (0, 0))
+        surface.blit(image, (0, 0))
+        return Chunk(rect, surface, tiles)
+
+    def stream(self, view):
+        """Start building the chunks around `view` (a world rect) that are not
+        loaded yet, and drop queued builds that are no longer near it."""
+        self._view = pygame.Rect(view)
+        wanted = set(self._keys_in(view.inflate(2 * self.chunk_size, 0)))
+        for key in list(self._pending):
+            if key not in wanted:
+                self._pending.pop(key).cancel()
+        for key in wanted:
+            if key not in self._chunks and key not in self._pending:
+                self._pending[key] = _stream_executor().submit(self._build, *key)
+
+    def build_layer(self, role, svg_path):
+        """Rebuild the chunks around the last streamed view after one layer
+        file changed; runs off the main thread, apply_layer() swaps them in.
+
+        Chunks composite every layer, but the unchanged ones come back from
+        the raster cache, so only the changed file is re-rasterised.
+        """
+        exists = os.path.exists(svg_path)
+        if role == LEVEL_LAYER and not exists:
+            return None
+        layers = ChunkLayers(self.spikes_path, self.goal_path, self.bg_image)
+        if role == SPIKES_LAYER:
+            layers = layers._replace(spikes_path=svg_path if exists else None)
+        elif role == GOAL_LAYER:
+            layers = layers._replace(goal_path=svg_path if exists else None)
+        elif role == BACKGROUND_LAYER:
+            registry.discard(("surface", svg_path, SCREEN_WIDTH, SCREEN_HEIGHT, "fill"))
+            layers = layers._replace(bg_image=registry.surface(
+                svg_path, width=SCREEN_WIDTH, height=SCREEN_HEIGHT, scale_mode="fill") if exists else None)
+        keys = self._keys_in(self._view.inflate(2 * self.chunk_size, 0))
+        return ChunkUpdate(layers, {key: self._build(*key, layers=layers) for key in keys})
+
+    def apply_layer(self, update):
+        """Swap in chunks from build_layer(); every other chunk is stale and
+        dropped, to be rebuilt from the new files when next needed."""
+        self.spikes_path, self.goal_path, self.bg_image = update.layers
+        for future in self._pending.values():
+            future.cancel()
+        self._pending.clear()
+        self._scaled.clear()
+        self._chunks = OrderedDict(update.chunks)
+        self._window = pygame.Rect(0, 0, 0, 0)
+        self.revision += 1
+
+    @property
+    def nbytes(self):
+        return (sum(chunk.surface.get_pitch() * chunk.surface.get_height() + chunk.tiles.nbytes
+                    for chunk in self._chunks.values())
+                + sum(scaled.get_pitch() * scaled.get_height() for scaled in self._scaled.values()))
+
+    # -- drawing ----------------------------------------------------------------
+
+    def draw(self, surface, camera, scale=1.0):
+        """Blit the chunks visible through `camera`, optionally drawn at `scale`."""
+        ox, oy = camera.offset
+        if scale == 1.0:
+            surface.blits([
+                (chunk.surface, (chunk.rect.x - ox, chunk.rect.y - oy))
+                for chunk in map(self._chunk, self._keys_in(camera.rect))
+            ], doreturn=False)
+            return
+
+        # Scale chunk edges rather than sizes so neighbours meet without seams.
+        sx, sy = round(ox * scale), round(oy * scale)
+        blits = []
+        for key in self._keys_in(camera.rect):
+            chunk = self._chunk(key)
+            left, top = round(chunk.rect.left * scale), round(chunk.rect.top * scale)
+            blits.append((self._scaled_surface(key, chunk, scale, left, top), (left - sx, top - sy)))
+        surface.blits(blits, doreturn=False)
+
+    def _scaled_surface(self, key, chunk, scale, left, top):
+        scaled_key = key + (scale,)
+        scaled = self._scaled.get(scaled_key)
+        if scaled is None:
+            size = (round(chunk.rect.right * scale) - left, round(chunk.rect.bottom * scale) - top)
+            scaled = pygame.transform.smoothscale(chunk.surface, size)
+            self._scaled[scaled_key] = scaled
+            while len(self._scaled) > self.max_chunks:
+                self._scaled.popitem(last=False)
+        else:
+            self._scaled.move_to_end(scaled_key)
+        return scaled
+
+    # -- collision --------------------------------------------------------------
+
+    def collision_map(self):
+        """The whole level as one CollisionMap, for headless and batch simulation.
+
+        Tiles come from the same chunk builds as the streamed window, but are
+        kept for the full width (width x height bytes plus the distance index).
+        """
+        tiles = np.empty((self.height, self.width), dtype=np.uint8)
+        for key in self._keys_in(self.bounds):
+            chunk = self._chunks.get(key) or self._build(*key)
+            rect = chunk.rect
+            tiles[rect.top:rect.bottom, rect.left:rect.right] = chunk.tiles
+        return CollisionMap(tiles)
+
+    def tile_window(self, rect=None):
+        """Return ``(tiles, (x, y))``: tile bits around `rect` (or the last
+        queried box) and the world position of their top-left corner."""
+        if rect is not None:
+            self._tiles_around(rect)
+        return self._window_tiles, self._window.topleft
+
+    def _tiles_around(self, rect):
+        # Rebuild only once the box gets within half a margin of the edge.
+        needed = pygame.Rect(rect.left - WINDOW_MARGIN // 2, 0,
+                             rect.width + WINDOW_MARGIN, self.height).clip(self.bounds)
+        if needed.width and not self._window.contains(needed):
+            window = pygame.Rect(rect.left - WINDOW_MARGIN, 0,
+                                 rect.width + 2 * WINDOW_MARGIN, self.height).clip(self.bounds)
+            tiles = np.zeros((window.height, window.width), dtype=np.uint8)
+            for chunk in map(self._chunk, self._keys_in(window)):
+                part = chunk.rect.clip(window)
+                tiles[part.top - window.top:part.bottom - window.top,
+                      part.left - window.left:part.right - window.left] = chunk.tiles[
+                    part.top - chunk.rect.top:part.bottom - chunk.rect.top,
+                    part.left - chunk.rect.left:part.right - chunk.rect.left]
+            self._window = window
+            self._window_tiles = tiles
+        return self._window_tiles, self._window.left, self._window.top
+
+    def query(self, rect):
+        """Return the OR of the tile bits under `rect` (0 outside the level)."""
+        profiler.count("tile query")
+        tiles, wx, wy = self._tiles_around(rect)
+        x0 = max(rect.left - wx, 0)
+        x1 = min(rect.right - wx, tiles.shape[1])
+        y0 = max(rect.top - wy, 0)
+        y1 = min(rect.bottom - wy, tiles.shape[0])
+        if x0 >= x1 or y0 >= y1:
+            return 0
+        return int(np.bitwise_or.reduce(tiles[y0:y1, x0:x1], axis=None))
+
+    def sweep(self, rect, axis, direction):
+        """Same contract as DistanceIndex.sweep, answered by scanning the window.
+
+        Only SWEEP_RANGE pixels ahead are scanned: past that the result is a
+        lower bound (SWEEP_RANGE), or UNBOUNDED if the level ends first.
+        """
+        profiler.count("sweep")
+        tiles, wx, wy = self._tiles_around(rect)
+        if axis == "x":
+            lo, hi = max(rect.top - wy, 0), min(rect.bottom - wy, tiles.shape[0])
+            near, far, origin, extent, limit = rect.left, rect.right, wx, tiles.shape[1], self.width
+        else:
+            tiles = tiles.T
+            lo, hi = max(rect.left - wx, 0), min(rect.right - wx, tiles.shape[0])
+            near, far, origin, extent, limit = rect.top, rect.bottom, wy, tiles.shape[1], self.height
+        if lo >= hi:
+            return UNBOUNDED
+
+        if direction > 0:
+            if far >= limit:
+                return UNBOUNDED
+            start = max(far, 0) - origin
+            ahead = (tiles[lo:hi, start:start + SWEEP_RANGE] & SOLID).any(axis=0)
+            if ahead.any():
+                return start + int(ahead.argmax()) - (far - origin)
+            return UNBOUNDED if origin + start + SWEEP_RANGE >= limit else SWEEP_RANGE
+
+        edge = near - 1
+        if edge < 0:
+            return UNBOUNDED
+        stop = min(edge, limit - 1) - origin + 1
+        behind = (tiles[lo:hi, max(stop - SWEEP_RANGE, 0):stop] & SOLID).any(axis=0)[::-1]
+        if behind.any():
+            return edge - (origin + stop - 1 - int(behind.argmax()))
+        return UNBOUNDED if origin + stop - SWEEP_RANGE <= 0 else SWEEP_RANGE
+
+    def sense(self, rect):
+        flags = self.query(rect)
+        return Contacts(
+            left=self.sweep(rect, "x", -1) == 0,
+            right=self.sweep(rect, "x", 1) == 0,
+            ground=self.sweep(rect, "y", 1) == 0,
+            ceiling=self.sweep(rect, "y", -1) == 0,
+            hazard=bool(flags & HAZARD),
+            goal=bool(flags & GOAL),
+        )
+
+    def get_collisions(self, rect):
+        return bool(self.query(rect) & SOLID)
+
+    def touching_spikes(self, rect):
+        return bool(self.query(rect) & HAZARD)
+
+    def touching_goal(self, rect):
+        return bool(self.query(rect) & GOAL)
+
+    def resolve_collision(self, rect, velocity):
+        """Push `rect` up out of the level, like Level.resolve_collision."""
+        if not self.get_collisions(rect):
+            return rect.x, rect.y, velocity
+        for lift in range(1, rect.height + 10):
+            if not self.get_collisions(rect.move(0, -lift)):
+                return rect.x, rect.y - lift, 0
+        return rect.x, rect.y, velocity
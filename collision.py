@@ -0,0 +1,265 @@
+# typed per-pixel collision map and precomputed free-distance index
+from collections import namedtuple
+import numpy as np
+import pygame
+from profiler import profiler
+
+UNBOUNDED = float("inf")
+
+# Tile type bits stored in CollisionMap.tiles; a pixel may carry several.
+SOLID = 1
+HAZARD = 2
+GOAL = 4
+
+# Result of Level.sense(): which sides of a box touch the level, and whether
+# it overlaps a hazard or has reached the goal.
+Contacts = namedtuple("Contacts", "left right ground ceiling hazard goal")
+
+# Sentinels for "no solid pixel in this direction" (fit in int16).
+NO_HIT_HIGH = np.iinfo(np.int16).max
+NO_HIT_LOW = np.iinfo(np.int16).min
+
+
+def solid_from_surface(surface, threshold=127):
+    """Boolean [y, x] array of pixels pygame.mask.from_surface would set."""
+    return pygame.surfarray.array_alpha(surface).T > threshold
+
+
+def _nearest(solid, axis, reverse):
+    """For every pixel, the coordinate of the nearest solid pixel at or beyond it along `axis`."""
+    n = solid.shape[axis]
+    coords = np.arange(n, dtype=np.int16)
+    if axis == 0:
+        coords = coords[:, None]
+    if reverse:
+        hits = np.where(solid, coords, NO_HIT_HIGH).astype(np.int16)
+        flipped = np.flip(hits, axis=axis)
+        return np.flip(np.minimum.accumulate(flipped, axis=axis), axis=axis)
+    hits = np.where(solid, coords, NO_HIT_LOW).astype(np.int16)
+    return np.maximum.accumulate(hits, axis=axis)
+
+
+class DistanceIndex:
+    """Answers "how far can a box move along +x/-x/+y/-y before touching solid".
+
+    For every pixel it stores the coordinate of the nearest solid pixel to
+    the right, left, below and above it, so a sweep query is a single
+    min/max over the box's leading edge instead of stepping pixel by pixel.
+    Pixels outside the level are never solid.
+    """
+
+    def __init__(self, solid):
+        self.height, self.width = solid.shape
+        # x-direction tables are stored [x, y] so a box edge is a contiguous slice.
+        solid_t = np.ascontiguousarray(solid.T)
+        self.next_x = np.ascontiguousarray(_nearest(solid_t, 0, reverse=True))
+        self.prev_x = np.ascontiguousarray(_nearest(solid_t, 0, reverse=False))
+        self.next_y = np.ascontiguousarray(_nearest(solid, 0, reverse=True))
+        self.prev_y = np.ascontiguousarray(_nearest(solid, 0, reverse=False))
+
+    @classmethod
+    def from_surface(cls, surface):
+        return cls(solid_from_surface(surface))
+
+    @classmethod
+    def from_tables(cls, next_x, prev_x, next_y, prev_y):
+        """Wrap precomputed tables (e.g. mapped from a compiled level file)."""
+        index = cls.__new__(cls)
+        index.height, index.width = next_y.shape
+        index.next_x, index.prev_x = next_x, prev_x
+        index.next_y, index.prev_y = next_y, prev_y
+        return index
+
+    @property
+    def nbytes(self):
+        return self.next_x.nbytes + self.prev_x.nbytes + self.next_y.nbytes + self.prev_y.nbytes
+
+    def sweep(self, rect, axis, direction):
+        """Return how many whole pixels `rect` can move along `axis` ("x" or "y")
+        in `direction` (+1 or -1) before it would overlap a solid pixel.
+
+        Returns UNBOUNDED when nothing solid lies in the way.
+        """
+        profiler.count("sweep")
+        if axis == "x":
+            lo, hi, limit = rect.top, rect.bottom, self.height
+            near, far, size = rect.left, rect.right, self.width
+            next_table, prev_table = self.next_x, self.prev_x
+        else:
+            lo, hi, limit = rect.left, rect.right, self.width
+            near, far, size = rect.top, rect.bottom, self.height
+            next_table, prev_table = self.next_y, self.prev_y
+
+        lo = max(lo, 0)
+        hi = min(hi, limit)
+        if lo >= hi:
+            return UNBOUNDED
+
+        if direction > 0:
+            edge = far
+            if edge >= size:
+                return UNBOUNDED
+            hit = int(next_table[max(edge, 0), lo:hi].min())
+            if hit == NO_HIT_HIGH:
+                return UNBOUNDED
+            return hit - edge
+
+        edge = near - 1
+        if edge < 0:
+            return UNBOUNDED
+        hit = int(prev_table[min(edge, size - 1), lo:hi].max())
+        if hit == NO_HIT_LOW:
+            return UNBOUNDED
+        return edge - hit
+
+    def lift(self, rect, max_distance):
+        """Return the y of the nearest position at or above `rect` that is clear of
+        solid pixels, searching at most `max_distance` pixels up, or None."""
+        lo = max(rect.left, 0)
+        hi = min(rect.right, self.width)
+        if lo >= hi:
+            return rect.y
+
+        y = rect.y
+        while rect.y - y <= max_distance:
+            bottom = y + rect.height - 1
+            if bottom < 0:
+                return y
+            hit = int(self.prev_y[min(bottom, self.height - 1), lo:hi].max())
+            if hit < y:
+                return y
+            # Jump so the box sits directly on top of the solid pixel found.
+            y = hit - rect.height
+        return None
+
+
+# Filled masks for box queries, by size (a level only ever asks for a few).
+_box_masks = {}
+
+
+def _box_mask(size):
+    box = _box_masks.get(size)
+    if box is None:
+        box = _box_masks[size] = pygame.Mask(size, fill=True)
+    return box
+
+
+def _flag_mask(tiles, flag):
+    """pygame.Mask of the pixels carrying `flag`, or None if there are none."""
+    plane = (tiles & flag) != 0
+    if not plane.any():
+        return None
+    height, width = tiles.shape
+    surface = pygame.image.frombuffer(plane.view(np.uint8), (width, height), "P")
+    surface.set_colorkey(0)
+    return pygame.mask.from_surface(surface)
+
+
+class CollisionMap:
+    """Every collision layer of a level in one uint8 [y, x] array.
+
+    Each pixel holds SOLID/HAZARD/GOAL bits. Box queries are answered from a
+    bit mask per tile type, derived from the tiles whenever a layer changes,
+    so "does this box touch X" is one C-level mask overlap.
+    """
+
+    def __init__(self, tiles, distance_index=None):
+        self.tiles = tiles
+        self.height, self.width = tiles.shape
+        if distance_index is None:
+            distance_index = DistanceIndex((tiles & SOLID) != 0)
+        self.distance_index = distance_index
+        self._masks = {flag: _flag_mask(tiles, flag) for flag in (SOLID, HAZARD, GOAL)}
+        # Bumped whenever a layer is replaced, so callers can tell cached
+        # answers are stale.
+        self.revision = 0
+
+    @classmethod
+    def from_layers(cls, width, height, solid=None, hazard=None, goal=None, distance_index=None):
+        """Build a map from boolean [y, x] layers; missing layers are empty.
+
+        Without a goal layer the rightmost column is the goal, matching the
+        old "reach the right edge" rule.
+        """
+        tiles = np.zeros((height, width), dtype=np.uint8)
+        collision_map = cls(tiles, distance_index or DistanceIndex(
+            solid if solid is not None else np.zeros((height, width), dtype=bool)))
+        for flag, layer in ((SOLID, solid), (HAZARD, hazard), (GOAL, goal)):
+            collision_map._write_layer(flag, layer)
+        return collision_map
+
+    def _write_layer(self, flag, layer):
+        self.tiles &= np.uint8(~flag & 0xFF)
+        if layer is not None:
+            self.tiles |= layer.view(np.uint8) * np.uint8(flag)
+        elif flag == GOAL:
+            self.tiles[:, -1] |= GOAL
+        self._masks[flag] = _flag_mask(self.tiles, flag)
+        self.revision += 1
+
+    def set_layer(self, flag, layer, distance_index=None):
+        """Replace one layer. Replacing SOLID also rebuilds the distance index."""
+        self._write_layer(flag, layer)
+        if flag == SOLID:
+            self.distance_index = distance_index or DistanceIndex((self.tiles & SOLID) != 0)
+
+    @property
+    def nbytes(self):
+        masks = sum(1 for mask in self._masks.values() if mask is not None)
+        return self.tiles.nbytes + self.distance_index.nbytes + masks * self.width * self.height // 8
+
+    def touches(self, flag, rect):
+        """True if any pixel under `rect` carries `flag` (False outside the map)."""
+        profiler.count("tile query")
+        mask = self._masks[flag]
+        return mask is not None and mask.overlap(_box_mask(rect.size), rect.topleft) is not None
+
+    def query(self, rect):
+        """Return the OR of the tile bits under `rect` (0 outside the map)."""
+        profiler.count("tile query")
+        box = _box_mask(rect.size)
+        flags = 0
+        for flag, mask in self._masks.items():
+            if mask is not None and mask.overlap(box, rect.topleft) is not None:
+                flags |= flag
+        return flags
+
+    def sweep(self, rect, axis, direction):
+        return self.distance_index.sweep(rect, axis, direction)
+
+    # Same names as Level, so a bare CollisionMap can drive Cube physics.
+    def get_collisions(self, rect):
+        return self.touches(SOLID, rect)
+
+    def touching_spikes(self, rect):
+        return self.touches(HAZARD, rect)
+
+    def touching_goal(self, rect):
+        return self.touches(GOAL, rect)
+
+    def sense(self, rect):
+        """Every contact flag for `rect` from the per-flag masks: a side touches
+        when the one-pixel strip just past it holds a solid pixel."""
+        profiler.count("sense")
+        x, y, width, height = rect
+        masks = self._masks
+        solid = masks[SOLID]
+        if solid is None:
+            left = right = ground = ceiling = False
+        else:
+            column = _box_mask((1, height))
+            row = _box_mask((width, 1))
+            left = solid.overlap(column, (x - 1, y)) is not None
+            right = solid.overlap(column, (x + width, y)) is not None
+            ground = solid.overlap(row, (x, y + height)) is not None
+            ceiling = solid.overlap(row, (x, y - 1)) is not None
+        box = _box_mask((width, height))
+        hazard, goal = masks[HAZARD], masks[GOAL]
+        return Contacts(
+            left=left,
+            right=right,
+            ground=ground,
+            ceiling=ceiling,
+            hazard=hazard is not None and hazard.overlap(box, (x, y)) is not None,
+            goal=goal is not None and goal.overlap(box, (x, y)) is not None,
+        )
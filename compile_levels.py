@@ -0,0 +1,67 @@
+# build-time level compiler: python compile_levels.py [level numbers...]
+# Turns assets/Levels/Level{n}.svg, its spikes, goal and the background into
+# assets/Compiled/Level{n}.lvl so the game can load levels without cairosvg.
+import glob
+import os
+import re
+import sys
+import numpy as np
+import levelfile
+from chunked import is_scrolling
+from collision import CollisionMap
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from utils import rasterize_svg
+
+
+def _rasterize(path):
+    if not os.path.exists(path):
+        return None
+    data, size = rasterize_svg(path, SCREEN_WIDTH, SCREEN_HEIGHT, "fill")
+    return bytes(data)
+
+
+def _occupancy(data):
+    """Same rule as pygame.mask.from_surface: alpha above 127 is set."""
+    if data is None:
+        return None
+    return np.frombuffer(data, np.uint8).reshape(SCREEN_HEIGHT, SCREEN_WIDTH, 4)[..., 3] > 127
+
+
+def compile_level(level_number):
+    level = _rasterize(f"assets/Levels/Level{level_number}.svg")
+    spikes = _rasterize(f"assets/Obstacles/Spikes{level_number}.svg")
+    background = _rasterize("assets/Backgrounds/bg.svg")
+    goal = _rasterize(f"assets/Goals/Goal{level_number}.svg")
+
+    collision_map = CollisionMap.from_layers(
+        SCREEN_WIDTH, SCREEN_HEIGHT,
+        solid=_occupancy(level),
+        hazard=_occupancy(spikes),
+        goal=_occupancy(goal),
+    )
+    path = levelfile.compiled_path(level_number)
+    levelfile.write(path, SCREEN_WIDTH, SCREEN_HEIGHT, {
+        levelfile.LEVEL: level,
+        levelfile.SPIKES: spikes,
+        levelfile.BACKGROUND: background,
+    }, collision_map)
+    return path
+
+
+def level_numbers():
+    numbers = []
+    for path in glob.glob("assets/Levels/Level*.svg"):
+        m = re.search(r"Level(\d+)\.svg$", path)
+        if m:
+            numbers.append(int(m.group(1)))
+    return sorted(numbers)
+
+
+if __name__ == "__main__":
+    numbers = [int(arg) for arg in sys.argv[1:]] or level_numbers()
+    for n in numbers:
+        if is_scrolling(f"assets/Levels/Level{n}.svg"):
+            print(f"Level {n}: wider than the screen, streamed in chunks at runtime (skipped)")
+            continue
+        path = compile_level(n)
+        print(f"Level {n}: {path} ({os.path.getsize(path) / (1024 * 1024):.1f} MiB)")
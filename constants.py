@@ -21,3 +21,31 @@ GROUND_HEIGHT = 100
 MENU = 0
 PLAYING = 1
 game_state = MENU
+
+# Raster cache (rasterised SVGs stored as raw RGBA on disk)
+RASTER_CACHE_DIR = ".cache/raster"
+RASTER_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Asset registry memory budget (decoded surfaces, collision layers and sounds)
+ASSET_MEMORY_BUDGET = 256 * 1024 * 1024
+
+# Fixed-timestep physics
+PHYSICS_TICK_RATE = 240
+MAX_PHYSICS_STEPS = 8  # catch-up ticks per frame before falling behind
+
+# Particle effects: live particles kept at once (emission thins out near the cap).
+# Updating and drawing a full budget has to fit well inside one frame at FPS
+# (python bench.py -k Particle); 20k takes about a third of a 165 FPS frame.
+PARTICLE_BUDGET = 20_000
+
+# Scrolling levels are rasterised in square chunks; at most this many stay loaded
+LEVEL_CHUNK_SIZE = 512
+LEVEL_CHUNK_CACHE = 32
+
+# Seconds from launch to the first menu frame with --fast-start (python startup.py checks it)
+STARTUP_BUDGET = 1.0
+
+# Audio: mixer rate, buffer (samples per mix; smaller is lower latency) and voices
+AUDIO_FREQUENCY = 44100
+AUDIO_BUFFER = 256
+AUDIO_VOICES = 16
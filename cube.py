@@ -1,13 +1,37 @@
+from collections import namedtuple
+import numpy as np
 import pygame
 from constants import SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_Y, WHITE
-import sound
-from utils import svg_to_surface
-from sound import SoundManager
-soundmgr = SoundManager()
+from assets import registry
+from sound import audio
+from trail import TrailBuffer
+from particles import effects
+
+
+# Long trails share this many alpha variants instead of one per sample.
+MAX_TRAIL_ALPHA_LEVELS = 32
+
+# One tick of player input: the four controls the cube reacts to.
+Inputs = namedtuple("Inputs", "left right jump down")
+
+
+def inputs_from_keys(keys):
+    """Map pygame's key state (arrows/WASD/space) to Inputs."""
+    return Inputs(
+        left=bool(keys[pygame.K_LEFT] or keys[pygame.K_a]),
+        right=bool(keys[pygame.K_RIGHT] or keys[pygame.K_d]),
+        jump=bool(keys[pygame.K_SPACE] or keys[pygame.K_w]),
+        down=bool(keys[pygame.K_DOWN] or keys[pygame.K_s]),
+    )
+
+
 class Cube:
-    def __init__(self, x, y, size=50):
+    def __init__(self, x, y, size=50, headless=False):
         self.x = x
         self.y = y
+        # Position at the start of the last physics tick, for interpolation.
+        self.prev_x = x
+        self.prev_y = y
         self.size = size
         self.velocity_x = 0
         self.velocity_y = 0
@@ -20,19 +44,30 @@ class Cube:
         self.wall_slide_gravity_scale = 0.5
         self.wall_slide_max_fall = 40.5
         self.wall_jump_h_mult = 1.7
+        # Landing faster than this (px/s) kicks up dust.
+        self.landing_dust_speed = 600
         self.jump_key_held = False
+        # Last level.sense() result and the (level, revision, rect) it was taken for.
+        self._contacts = None
+        self._contacts_key = None
         self.sprite = None
-        self.trail = []
         self.max_trail_length = 20
+        self.trail = TrailBuffer(self.max_trail_length)
         self.trail_surface = pygame.Surface((self.size, self.size), pygame.SRCALPHA)
         self._trail_sprite_cache = []
         self._trail_rect_cache = []
         self._trail_cache_key = None
+        self._trail_variant_cache = {}
+        self._scaled_sprite_cache = {}
+        # Headless cubes (simulation, tests) skip the sprite and sounds.
+        self.headless = headless
+        self.deaths = 0
 
         #cache player sprite
         try:
-            img = svg_to_surface("assets/player.svg", width=self.size, height=self.size, scale_mode="fit")
-            self.sprite = img.convert_alpha()
+            if headless:
+                raise RuntimeError("headless cube has no sprite")
+            self.sprite = registry.surface("assets/player.svg", width=self.size, height=self.size, scale_mode="fit")
         except Exception:            self.sprite = None
         self._rebuild_trail_cache()
     
@@ -40,6 +75,9 @@ class Cube:
         """Instantly move player to a specific position"""
         self.x = new_x
         self.y = new_y
+        # Don't interpolate across a teleport.
+        self.prev_x = new_x
+        self.prev_y = new_y
 
     def _rebuild_trail_cache(self):
         """Rebuild cached alpha variants used by the trail renderer."""
@@ -48,15 +86,17 @@ class Cube:
             return
 
         self._trail_cache_key = cache_key
+        self._scaled_sprite_cache = {}
         self._trail_sprite_cache = []
         self._trail_rect_cache = []
 
         max_alpha = 200
-        if self.max_trail_length <= 0:
+        levels = min(self.max_trail_length, MAX_TRAIL_ALPHA_LEVELS)
+        if levels <= 0:
             return
 
-        for i in range(self.max_trail_length):
-            alpha = int(max_alpha * ((i + 1) / self.max_trail_length))
+        for i in range(levels):
+            alpha = int(max_alpha * ((i + 1) / levels))
             if self.sprite:
                 temp = self.sprite.copy()
                 temp.fill((255, 255, 255, alpha), special_flags=pygame.BLEND_RGBA_MULT)
@@ -67,16 +107,18 @@ class Cube:
                 temp.set_alpha(alpha)
                 self._trail_rect_cache.append(temp)
 
+    def _trail_variants(self, count, levels):
+        """Alpha variant index for each of `count` trail samples, oldest first."""
+        key = (count, levels)
+        variants = self._trail_variant_cache.get(key)
+        if variants is None:
+            variants = np.arange(1, count + 1) * levels // count - 1
+            np.clip(variants, 0, levels - 1, out=variants)
+            self._trail_variant_cache[key] = variants
+        return variants
+
     def handle_input(self, keys, *args):
         """Handle keyboard input for cube movement"""
-        self.velocity_x = 0
-        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
-            self.velocity_x = -self.speed
-        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
-            self.velocity_x = self.speed
-
-        # jump handling: detect initial press (not held)
-        pressed = keys[pygame.K_SPACE] or keys[pygame.K_w]
         level = None
         try:
             # callers may pass (keys, level)
@@ -84,12 +126,27 @@ class Cube:
         except Exception:
             pass
 
+        self.apply_input(*inputs_from_keys(keys), level=level)
+
+    def apply_input(self, left, right, jump, down, level=None):
+        """Apply one tick of input state (independent of pygame's keyboard)."""
+        self.velocity_x = 0
+        if left:
+            self.velocity_x = -self.speed
+        if right:
+            self.velocity_x = self.speed
+
+        # jump handling: detect initial press (not held)
+        pressed = jump
+
         touching_left = False
         touching_right = False
+        touching_ground = False
         if level:
-            rect = self.rect()
-            touching_left = level.get_collisions(rect.move(-1, 0))
-            touching_right = level.get_collisions(rect.move(1, 0))
+            contacts = self._sense(level)
+            touching_left = contacts.left
+            touching_right = contacts.right
+            touching_ground = contacts.ground
 
         # Determine if we are sliding on a wall: in-air, touching a wall and falling
         self.wall_sliding = (not self.on_ground()) and (touching_left or touching_right) and self.velocity_y > 0
@@ -102,8 +159,6 @@ class Cube:
 
 
         if level:
-            rect = self.rect()
-            touching_ground = level.get_collisions(rect.move(0, 1))
             touching_wall = touching_left or touching_right
             can_jump = touching_ground or (touching_wall and not touching_ground)
         else:
@@ -120,82 +175,29 @@ class Cube:
 
         self.jump_key_held = pressed
 
-        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+        if down:
             self.velocity_y = self.speed
 
     def update(self, dt, level=None):
         """Update cube position with collisions, frame-rate independent."""
+        self.prev_x = self.x
+        self.prev_y = self.y
 
         # Spike collision
-        if level and level.touching_spikes(self.rect()):
-            soundmgr.death_sound()
+        if level and self._sense(level).hazard:
+            self._on_death()
             self.teleport(0, 500)
             self.velocity_x = 0
             self.velocity_y = 0
 
-        def _resolve_axis(delta, axis):
-            if delta == 0:
-                return False
-
-            blocked = False
-            start = self.x if axis == "x" else self.y
-            direction = 1 if delta > 0 else -1
-            steps = abs(int(delta))
-
-            # Move in bounded whole-pixel steps and stop at first contact.
-            for _ in range(steps):
-                candidate = start + direction
-                if axis == "x":
-                    self.x = candidate
-                else:
-                    self.y = candidate
-
-                if level and level.get_collisions(self.rect()):
-                    if axis == "x":
-                        self.x = start
-                    else:
-                        self.y = start
-                    blocked = True
-                    break
-
-                start = candidate
-
-            if blocked:
-                return True
-
-            # Resolve the remaining fractional movement with a bounded binary search.
-            end = (self.x if axis == "x" else self.y) + (delta - (direction * steps))
-            low = self.x if axis == "x" else self.y
-            high = end
-
-            for _ in range(12):
-                if abs(high - low) <= 0.001:
-                    break
-                mid = (low + high) * 0.5
-                if axis == "x":
-                    self.x = mid
-                else:
-                    self.y = mid
-
-                if level and level.get_collisions(self.rect()):
-                    high = mid
-                    blocked = True
-                else:
-                    low = mid
-
-            if axis == "x":
-                self.x = low
-            else:
-                self.y = low
-
-            return blocked
-
         # --- Horizontal movement ---
         dx = self.velocity_x * dt
-        x_blocked = _resolve_axis(dx, "x")
+        x_blocked = self._move_axis(dx, "x", level)
 
-        # Keep cube within screen bounds
-        clamped_x = max(0, min(self.x, SCREEN_WIDTH - self.size))
+        # Keep cube within the level (the screen when there is none)
+        world_width = level.width if level else SCREEN_WIDTH
+        world_height = level.height if level else SCREEN_HEIGHT
+        clamped_x = max(0, min(self.x, world_width - self.size))
         if clamped_x != self.x:
             x_blocked = True
             self.x = clamped_x
@@ -214,12 +216,18 @@ class Cube:
         # Move vertically
         dy = self.velocity_y * dt
         was_falling = self.velocity_y > 0
-        y_blocked = _resolve_axis(dy, "y")
+        y_blocked = self._move_axis(dy, "y", level)
         if y_blocked:
             if was_falling:
                 self.jumping = False
+                if not self.headless and self.velocity_y > self.landing_dust_speed:
+                    effects.landing_dust(self.x + self.size / 2, self.y + self.size, self.velocity_y)
             self.velocity_y = 0
 
+        if self.wall_sliding and not self.headless:
+            wall_x = self.x if self.wall_dir < 0 else self.x + self.size
+            effects.wall_spark(wall_x, self.y + self.size / 2, self.wall_dir)
+
         # Ground collision fallback
         if level is None and self.y + self.size >= GROUND_Y:
             self.y = GROUND_Y - self.size
@@ -227,19 +235,68 @@ class Cube:
             self.jumping = False
 
         # Update trail
-        self.trail.append((self.x, self.y))
-        if len(self.trail) > self.max_trail_length:
-            self.trail.pop(0)
+        if self.trail.capacity != self.max_trail_length:
+            self.trail.resize(self.max_trail_length)
+        self.trail.append(self.x, self.y)
 
-        # Kill player if they fall below the screen
-        if self.y > SCREEN_HEIGHT:
-            soundmgr.death_sound()
+        # Kill player if they fall below the level
+        if self.y > world_height:
+            self._on_death()
             self.teleport(0, 500)
         
-        #signal next level if player reaches right edge of screen
-        if self.x + self.size >= SCREEN_WIDTH:
+        #signal next level if player reaches the goal (right edge of screen by default)
+        if level:
+            if self._sense(level).goal:
+                return True
+        elif self.x + self.size >= SCREEN_WIDTH:
             return True
 
+    def _sense(self, level):
+        """level.sense() for the cube's rect, reused until the cube moves or
+        the level's layers change: the sense after a tick's move also serves
+        the next tick's input and spike check, so each tick costs one pass."""
+        rect = self.rect()
+        key = (level, level.revision, tuple(rect))
+        if key != self._contacts_key:
+            self._contacts = level.sense(rect)
+            self._contacts_key = key
+        return self._contacts
+
+    def _on_death(self):
+        self.deaths += 1
+        if not self.headless:
+            effects.death_burst(self.x + self.size / 2, self.y + self.size / 2)
+            audio.death_sound()
+
+    def _move_axis(self, delta, axis, level):
+        """Move `delta` pixels along `axis`, stopping flush against the level.
+
+        Returns True if the movement was blocked.
+        """
+        if delta == 0:
+            return False
+
+        target = (self.x if axis == "x" else self.y) + delta
+        blocked = False
+        if level:
+            # One sweep query tells how many whole pixels are free ahead.
+            rect = self.rect()
+            start = rect.x if axis == "x" else rect.y
+            direction = 1 if delta > 0 else -1
+            free = level.sweep(rect, axis, direction)
+            if direction > 0 and target >= start + free + 1:
+                target = start + free
+                blocked = True
+            elif direction < 0 and target < start - free:
+                target = start - free
+                blocked = True
+
+        if axis == "x":
+            self.x = target
+        else:
+            self.y = target
+        return blocked
+
     def on_ground(self):
         """Return True if cube is standing on the ground"""
         return self.y + self.size >= GROUND_Y
@@ -248,26 +305,75 @@ class Cube:
         """Return bounding rect for collision checks."""
         return pygame.Rect(int(self.x), int(self.y), int(self.size), int(self.size))
 
-    def draw(self, surface):
+    def draw_position(self, alpha=1.0):
+        """Position between the previous and current physics tick, `alpha` 0..1."""
+        return (self.prev_x + (self.x - self.prev_x) * alpha,
+                self.prev_y + (self.y - self.prev_y) * alpha)
+
+    def _sprites_at(self, scale):
+        """(sprite, trail variants, size) for drawing at `scale`, cached per scale."""
+        trail_sprites = self._trail_sprite_cache if self.sprite else self._trail_rect_cache
+        if scale == 1.0:
+            return self.sprite, trail_sprites, self.size
+        cached = self._scaled_sprite_cache.get(scale)
+        if cached is None:
+            size = max(1, round(self.size * scale))
+            shrink = lambda image: pygame.transform.smoothscale(image, (size, size))
+            sprite = shrink(self.sprite) if self.sprite else None
+            cached = self._scaled_sprite_cache[scale] = (sprite, [shrink(s) for s in trail_sprites], size)
+        return cached
+
+    def draw(self, surface, alpha=1.0, offset=(0, 0), scale=1.0):
+        """Draw the trail and cube; returns the bounding rect of everything drawn.
+
+        `alpha` (0..1) places the cube, and the head of its trail, between
+        its previous and current physics positions, for smooth motion with
+        a fixed physics tick.
+        Everything is shifted by -`offset` (the camera position), then
+        multiplied by `scale` when drawing into a reduced-resolution surface.
+        """
         self._rebuild_trail_cache()
-
-        # Draw trail
-        trail_length = len(self.trail)
-        if trail_length == 0:
-            trail_length = 1
-
-        for i, (tx, ty) in enumerate(self.trail):
-            # newest = more opaque, oldest = transparent
-            cache_index = int((i + 1) * self.max_trail_length / trail_length) - 1
-            cache_index = max(0, min(cache_index, self.max_trail_length - 1))
-
-            if self.sprite:
-                surface.blit(self._trail_sprite_cache[cache_index], (int(tx), int(ty)))
-            else:
-                surface.blit(self._trail_rect_cache[cache_index], (int(tx), int(ty)))
+        sprite, sprites, size = self._sprites_at(scale)
+
+        x, y = self.draw_position(alpha)
+
+        # Draw trail: newest = more opaque, oldest = transparent. The newest
+        # sample is this tick's position; it is moved to the interpolated
+        # one so the trail ends under the cube instead of ahead of it.
+        trail = self.trail.positions()
+        if len(trail) and alpha != 1.0:
+            trail = trail.copy()
+            trail[-1] = int(x), int(y)
+        if offset != (0, 0):
+            trail = trail - np.array(offset, dtype=np.int32)
+        if scale != 1.0:
+            trail = (trail * scale).astype(np.int32)
+        count = len(trail)
+        if count and sprites:
+            variant = self._trail_variants(count, len(sprites))
+            # Samples repeating the next one's position (a cube at rest) would
+            # be hidden under it anyway; only the newest of each run is drawn.
+            packed = trail.view(np.int64).ravel()
+            keep = np.empty(count, dtype=bool)
+            keep[-1] = True
+            np.not_equal(packed[:-1], packed[1:], out=keep[:-1])
+            surface.blits(
+                [(sprites[i], pos) for i, pos in zip(variant[keep].tolist(), trail[keep].tolist())],
+                doreturn=False,
+            )
 
         # Draw main cube on top
-        if self.sprite:
-            surface.blit(self.sprite, (int(self.x), int(self.y)))
+        draw_x = int((int(x) - offset[0]) * scale)
+        draw_y = int((int(y) - offset[1]) * scale)
+        if sprite:
+            surface.blit(sprite, (draw_x, draw_y))
         else:
-            pygame.draw.rect(surface, WHITE, self.rect())
+            pygame.draw.rect(surface, WHITE, (draw_x, draw_y, size, size))
+
+        left, top = draw_x, draw_y
+        right, bottom = draw_x, draw_y
+        if count:
+            left, top = min(left, int(trail[:, 0].min())), min(top, int(trail[:, 1].min()))
+            right, bottom = max(right, int(trail[:, 0].max())), max(bottom, int(trail[:, 1].max()))
+        return pygame.Rect(left, top, right - left + size, bottom - top + size)
+
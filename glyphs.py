@@ -0,0 +1,165 @@
+# glyph atlas text rendering: glyphs are rasterised once, strings are laid
+# out once and drawn with a single Surface.blits call
+from collections import OrderedDict
+import pygame
+from assets import registry, surface_bytes
+
+# 3x5 bitmap digits, used for the fps counter when no font is needed.
+SMALL_DIGITS = {
+    "0": ["111", "101", "101", "101", "111"],
+    "1": ["010", "110", "010", "010", "111"],
+    "2": ["111", "001", "111", "100", "111"],
+    "3": ["111", "001", "111", "001", "111"],
+    "4": ["101", "101", "111", "001", "001"],
+    "5": ["111", "100", "111", "001", "111"],
+    "6": ["111", "100", "111", "101", "111"],
+    "7": ["111", "001", "010", "010", "010"],
+    "8": ["111", "101", "111", "101", "111"],
+    "9": ["111", "101", "111", "001", "111"],
+}
+
+ATLAS_WIDTH = 512
+MAX_CACHED_STRINGS = 256
+
+
+class GlyphAtlas:
+    """Packs glyph images into one surface and caches string layouts.
+
+    `render_glyph(ch)` returns ``(surface, advance)`` for a character; every
+    glyph must be `line_height` pixels tall. Glyphs are added to the atlas
+    the first time they are used, and the last `max_strings` laid-out
+    strings are kept (least recently used first out).
+
+    Without `measure` glyphs are placed by whole-pixel advances. With a
+    font's `measure(text)` (its rendered width) each glyph goes where the
+    font itself would put it, kerning and fractional advances included:
+    at measure(text up to and including it) - measure(glyph).
+    """
+
+    def __init__(self, render_glyph, line_height, max_strings=MAX_CACHED_STRINGS, measure=None):
+        self._render_glyph = render_glyph
+        self._measure = measure
+        self.line_height = line_height
+        self.max_strings = max_strings
+        self.surface = self._new_surface((ATLAS_WIDTH, line_height * 4))
+        self._glyphs = {}  # ch -> (area in the atlas, advance)
+        self._layouts = OrderedDict()  # text -> ([(dx, area), ...], width)
+        self._pen = [0, 0]
+
+    @staticmethod
+    def _new_surface(size):
+        surface = pygame.Surface(size, pygame.SRCALPHA)
+        if pygame.display.get_surface() is None:
+            return surface
+        return surface.convert_alpha()
+
+    def _add_glyph(self, ch):
+        image, advance = self._render_glyph(ch)
+        w = image.get_width()
+        x, y = self._pen
+        if x + w > self.surface.get_width():
+            x, y = 0, y + self.line_height
+        if y + self.line_height > self.surface.get_height():
+            # Out of rows: double the atlas height. Cached layouts stay valid,
+            # they only hold areas within the atlas.
+            grown = self._new_surface((self.surface.get_width(), self.surface.get_height() * 2))
+            grown.blit(self.surface, (0, 0))
+            self.surface = grown
+        self.surface.blit(image, (x, y))
+        self._pen = [x + w, y]
+        glyph = self._glyphs[ch] = (pygame.Rect(x, y, w, self.line_height), advance)
+        return glyph
+
+    def layout(self, text):
+        """Return ``([(dx, area), ...], width)`` for `text`, cached."""
+        cached = self._layouts.get(text)
+        if cached is not None:
+            self._layouts.move_to_end(text)
+            return cached
+
+        runs = []
+        pen = 0
+        width = 0
+        measure = self._measure
+        for i, ch in enumerate(text):
+            glyph = self._glyphs.get(ch) or self._add_glyph(ch)
+            area, advance = glyph
+            if measure is not None:
+                pen = measure(text[:i + 1]) - area.width
+            if area.width:
+                runs.append((pen, area))
+                width = max(width, pen + area.width)
+            pen += advance
+        if measure is not None:
+            pen = measure(text)
+        cached = self._layouts[text] = (runs, max(width, pen))
+        if len(self._layouts) > self.max_strings:
+            self._layouts.popitem(last=False)
+        return cached
+
+    def size(self, text):
+        return self.layout(text)[1], self.line_height
+
+    def draw(self, surface, text, pos=(0, 0), center=None):
+        """Blit `text` at `pos` (top-left) or centred on `center`; returns the rect touched."""
+        runs, width = self.layout(text)
+        if center is not None:
+            x = center[0] - width // 2
+            y = center[1] - self.line_height // 2
+        else:
+            x, y = pos
+        atlas = self.surface
+        surface.blits([(atlas, (x + dx, y), area) for dx, area in runs], doreturn=False)
+        return pygame.Rect(x, y, width, self.line_height)
+
+
+def _bitmap_glyph(scale, color):
+    def render(ch):
+        # Unknown characters fall back to "0", as the original HUD font did.
+        pattern = SMALL_DIGITS.get(ch, SMALL_DIGITS["0"])
+        image = pygame.Surface((3 * scale, 5 * scale), pygame.SRCALPHA)
+        for ry, row in enumerate(pattern):
+            for rx, c in enumerate(row):
+                if c == "1":
+                    image.fill(color, (rx * scale, ry * scale, scale, scale))
+        return image, 3 * scale + scale + 1
+    return render
+
+
+def _font_glyph(font, color, antialias):
+    def render(ch):
+        try:
+            image = font.render(ch, antialias, color)
+        except pygame.error:
+            # Characters the face has nothing for render as zero width.
+            return pygame.Surface((0, font.get_height()), pygame.SRCALPHA), 0
+        metrics = font.metrics(ch)
+        advance = metrics[0][4] if metrics and metrics[0] else image.get_width()
+        return image, advance
+    return render
+
+
+def _atlas_bytes(atlas):
+    return surface_bytes(atlas.surface)
+
+
+def small_digits(scale=4, color=(255, 0, 0)):
+    """Shared atlas for the 3x5 bitmap digits at `scale`."""
+    color = tuple(color)
+    return registry.get(
+        ("glyph_atlas", "small_digits", scale, color),
+        lambda: GlyphAtlas(_bitmap_glyph(scale, color), 5 * scale),
+        _atlas_bytes,
+    )
+
+
+def sysfont(name, size, color=(255, 255, 255), antialias=True):
+    """Shared atlas for a SysFont face at `size` in `color`."""
+    color = tuple(color)
+
+    def load():
+        font = registry.font(name, size)
+        return GlyphAtlas(_font_glyph(font, color, antialias), font.get_height(),
+                          measure=lambda text: font.size(text)[0])
+
+    return registry.get(("glyph_atlas", name, size, color, antialias), load, _atlas_bytes)
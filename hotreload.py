@@ -0,0 +1,91 @@
+# level hot reload: polls the live level's layer files and swaps changed layers in
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from level import LEVEL_LAYER, SPIKES_LAYER, BACKGROUND_LAYER, GOAL_LAYER
+from prefetch import level_path
+
+
+def layer_paths(level_number):
+    """``{path: role}`` for every file level n is built from, present or not."""
+    return {
+        level_path(level_number): LEVEL_LAYER,
+        f"assets/Obstacles/Spikes{level_number}.svg": SPIKES_LAYER,
+        "assets/Backgrounds/bg.svg": BACKGROUND_LAYER,
+        f"assets/Goals/Goal{level_number}.svg": GOAL_LAYER,
+    }
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class LevelWatcher:
+    """Reloads the layers of the live level when their files change.
+
+    `poll()` is called once a frame; every `interval` seconds it compares
+    the mtimes of the level's files (polling, so it needs no OS file
+    events). A changed file is re-rasterised, with only its own mask and
+    collision data rebuilt, by `level.build_layer()` on a worker thread;
+    the result is swapped in by `level.apply_layer()` on a later poll, so
+    the frame never waits for it. Returns True from `poll()` when it did.
+    """
+
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hot-reload")
+        self._level = None
+        self._paths = {}  # path -> role
+        self._mtimes = {}  # path -> mtime_ns or None when missing
+        self._building = {}  # path -> Future[update]
+        self._stale = set()  # paths changed again while being rebuilt
+        self._next_check = 0.0
+
+    def watch(self, level, level_number):
+        """Follow `level`; results of rebuilds for a previous level are dropped."""
+        self._level = level
+        self._paths = layer_paths(level_number)
+        self._mtimes = {path: _mtime(path) for path in self._paths}
+        self._building.clear()
+        self._stale.clear()
+
+    def poll(self):
+        swapped = False
+        for path, future in list(self._building.items()):
+            if not future.done():
+                continue
+            del self._building[path]
+            try:
+                update = future.result()
+            except Exception as e:
+                # Often a file caught mid-save; the next write retries it.
+                print(f"Error reloading '{path}': {e}")
+                continue
+            if update is not None:
+                self._level.apply_layer(update)
+                swapped = True
+                print(f"Reloaded {path}")
+
+        now = time.perf_counter()
+        if self._level is None or now < self._next_check:
+            return swapped
+        self._next_check = now + self.interval
+
+        for path, role in self._paths.items():
+            mtime = _mtime(path)
+            if mtime != self._mtimes[path]:
+                self._mtimes[path] = mtime
+                self._stale.add(path)
+        for path in list(self._stale):
+            if path not in self._building:
+                self._stale.discard(path)
+                self._building[path] = self._executor.submit(
+                    self._level.build_layer, self._paths[path], path)
+        return swapped
+
+    def shutdown(self):
+        self._building.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
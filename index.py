@@ -1,120 +1,320 @@
 # main entry point, pulls together components
+from startup import startup
+import argparse
 import pygame
 import sys
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, BLACK, RED
-from cube import Cube
-from level import Level
-from sound import SoundManager
+import time
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, FPS, RED
+from cube import Cube, inputs_from_keys
+from sound import audio, pre_init_mixer
 from text import IntroText
-from utils import svg_to_surface
 from menu import LevelMenu
+from prefetch import LevelPrefetcher, build_level
+from render import DirtyRenderer
+from timestep import FixedTimestep
+from replay import Recorder, Replay
+from profiler import profiler
+from assets import registry
+from particles import effects
+from camera import Camera
+from resolution import ResolutionScaler
+from hotreload import LevelWatcher
+import glyphs
+startup.mark("imports")
 
 draw_background = True
+# Composite static layers once per level and present only dirty rects.
+dirty_rendering = True
+# Playback speed while TAB is held during a replay.
+replay_fast_forward = 8
+# Drop the world's render resolution when frames run over the FPS budget.
+adaptive_resolution = True
+# Rasterise every manifest asset across all cores behind a loading screen.
+preload_assets = True
+# F3 toggles the frame profiler overlay, F4 writes its Chrome trace here.
+profile_trace_path = "profile_trace.json"
+# F5 prints the asset registry: bytes per asset, hits and misses.
+
+parser = argparse.ArgumentParser(description="Flip It! 4 - 2D Platformer Demo")
+parser.add_argument("--record", metavar="PATH", help="record per-tick input and the final state to PATH on exit")
+parser.add_argument("--replay", metavar="PATH", help="play back a recording instead of the keyboard")
+parser.add_argument("--fast-start", action="store_true",
+                    help="show the menu first: no preloading, audio starts after the first frame")
+parser.add_argument("--startup-trace", metavar="PATH", help="write startup step timings to PATH (see startup.py)")
+parser.add_argument("--quit-at-menu", action="store_true", help="exit once the first frame is shown")
+parser.add_argument("--watch", action="store_true",
+                    help="reload the level's SVG layers when they change on disk")
+args = parser.parse_args()
+
+def start_audio():
+    audio.init()
+    audio.play_music("assets/Music/music.mp3", loop=True)
+    audio.set_music_volume(0.1)
 
-def _draw_small_number(surface, text, pos, scale=4, color=(255, 0, 0)):
-    """Draw a small 3x5-pixel font for digits as a fallback when no font is available."""
-    patterns = {
-        "0": ["111","101","101","101","111"],
-        "1": ["010","110","010","010","111"],
-        "2": ["111","001","111","100","111"],
-        "3": ["111","001","111","001","111"],
-        "4": ["101","101","111","001","001"],
-        "5": ["111","100","111","001","111"],
-        "6": ["111","100","111","101","111"],
-        "7": ["111","001","010","010","010"],
-        "8": ["111","101","111","101","111"],
-        "9": ["111","101","111","001","111"],
-    }
-    x0, y0 = pos
-    spacing = scale + 1
-    for i, ch in enumerate(text):
-        pattern = patterns.get(ch, patterns.get("0"))
-        x_offset = i * (3 * scale + spacing) 
-        for ry, row in enumerate(pattern):
-            for rx, c in enumerate(row):
-                if c == "1":
-                    rect = (x0 + x_offset + rx * scale, y0 + ry * scale, scale, scale)
-                    pygame.draw.rect(surface, color, rect)
 
 def load_level(level_number):
-    global level, current_level
+    global level, current_level, intro
+
+    if intro is None:
+        # Only shown once a level starts, so not built for the menu.
+        intro = IntroText("assets/Text/Text.svg")
 
     current_level = level_number
-    level = Level(f"assets/Levels/Level{level_number}.svg")
+    # Usually already built in the background; otherwise build it now.
+    level = prefetcher.take(level_number)
+    if level is None:
+        level = build_level(level_number)
+    camera.set_world(level.width, level.height)
+    if watcher is not None:
+        watcher.watch(level, level_number)
+
+    # Start on the next level while this one is played, dropping stale work.
+    prefetcher.retain(level_number + 1)
+    prefetcher.request(level_number + 1)
 
     cube.teleport(100, 0)
     cube.velocity_x = 0
     cube.velocity_y = 0
+    effects.clear()
 
 
+# Start rasterising before pygame opens a window, so workers fork without one.
+# Fast start skips this: assets load on first use from the raster cache or
+# compiled levels, and cairosvg is only imported on a miss.
+preloader = None
+if preload_assets and not args.fast_start:
+    from manifest import build_manifest
+    from preload import Preloader
+    preloader = Preloader(build_manifest())
+    preloader.start()
+
 # initialize pygame
-pygame.init()
+pre_init_mixer()
+if args.fast_start:
+    # Only what the menu needs; the mixer starts after the first frame.
+    pygame.display.init()
+    pygame.font.init()
+else:
+    pygame.init()
+startup.mark("pygame init")
 screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
 pygame.display.set_caption("Flip It! 4 - 2D Platformer Demo")
 clock = pygame.time.Clock()
-font = None
-font_is_freetype = False
+startup.mark("display")
+
+if preloader is not None:
+    from loading import LoadingScreen
+    loading = LoadingScreen()
+    while not preloader.done:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                preloader.shutdown()
+                pygame.quit()
+                sys.exit()
+        preloader.poll()
+        loading.draw(screen, preloader.progress)
+        pygame.display.flip()
+        clock.tick(60)
+    if preloader.total:
+        print(f"Preloaded {preloader.total} assets in {preloader.elapsed:.2f}s "
+              f"({preloader.workers} workers)")
+    startup.mark("preload")
+
+renderer = DirtyRenderer(screen)
+timestep = FixedTimestep()
+camera = Camera()
+scaler = ResolutionScaler(FPS)
 cube = Cube(SCREEN_WIDTH // 2 - 25, SCREEN_HEIGHT // 2 - 25)
 current_level = None
-sound_manager = SoundManager()
-sound_manager.play_music("assets/Music/music.mp3", loop=True)
-sound_manager.set_music_volume(0.1)
+prefetcher = LevelPrefetcher()
+watcher = LevelWatcher() if args.watch else None
+if not args.fast_start:
+    start_audio()
+    startup.mark("audio")
 # wait until level is set by menu before loading
 
-intro = IntroText("assets/Text/Text.svg")
+intro = None
 menu = LevelMenu()
+profile_font = None
+fps_text = glyphs.small_digits(scale=4, color=RED)
 cube.teleport(100, 0)
+startup.mark("game objects")
+
+recorder = None
+replay_inputs = None
+if args.replay:
+    replay = Replay.load(args.replay)
+    timestep = FixedTimestep(replay.tick_rate)
+    replay_inputs = replay.inputs()
+    load_level(replay.level_number)
+    menu.visible = False
 
 # Main game loop
 running = True
+world = screen
 while running:
     dt = clock.tick(FPS) / 1000.0
+    frame_start = time.perf_counter()
     dtfps = dt * 1000.0
+    profiler.begin_frame()
 
-    for event in pygame.event.get():
-
-        if event.type == pygame.QUIT:
-            running = False
+    with profiler.phase("events"):
+        for event in pygame.event.get():
 
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_ESCAPE:
+            if event.type == pygame.QUIT:
                 running = False
 
-        selected_level = menu.handle_event(event)
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                elif event.key == pygame.K_F3:
+                    if profile_font is None:
+                        profile_font = registry.font(None, 22)
+                    profiler.toggle()
+                    renderer.invalidate()
+                elif event.key == pygame.K_F4:
+                    profiler.export_chrome_trace(profile_trace_path)
+                    print(f"Wrote {len(profiler.frames)} frames to {profile_trace_path}")
+                elif event.key == pygame.K_F5:
+                    registry.print_report()
+
+            selected_level = menu.handle_event(event)
 
-        if selected_level is not None:
-            current_level = selected_level
-            level = Level(f"assets/Levels/Level{current_level}.svg")
-            menu.visible = False
-            cube.teleport(100, 0)
+            if selected_level is not None:
+                load_level(selected_level)
+                menu.visible = False
+                if args.record:
+                    recorder = Recorder(selected_level, round(1 / timestep.dt), cube.deaths)
 
-    keys = pygame.key.get_pressed()
+        keys = pygame.key.get_pressed()
 
 
     if current_level is not None:
-        cube.handle_input(keys, level)
-        result = cube.update(dt, level)
+        # Physics runs at a fixed tick rate; drawing interpolates between ticks.
+        speed = replay_fast_forward if replay_inputs is not None and keys[pygame.K_TAB] else 1
+        for _ in range(timestep.advance(dt * speed, timestep.max_steps * speed)):
+            if replay_inputs is not None:
+                tick_inputs = next(replay_inputs, None)
+                if tick_inputs is None:
+                    # Recording finished: hand control back to the keyboard.
+                    replay_inputs = None
+            if replay_inputs is None:
+                tick_inputs = inputs_from_keys(keys)
+            if recorder:
+                recorder.record(tick_inputs)
 
-        if result:
-            load_level(current_level + 1)
+            with profiler.phase("handle_input"):
+                cube.apply_input(*tick_inputs, level=level)
+            with profiler.phase("update"):
+                result = cube.update(timestep.dt, level)
 
-        if draw_background:
-            level.draw_background(screen)
+            if result:
+                with profiler.phase("load_level"):
+                    load_level(current_level + 1)
 
-        level.draw_spikes(screen, current_level)      
-        level.draw(screen)
-        cube.draw(screen)
+        if watcher is not None:
+            with profiler.phase("hot_reload"):
+                watcher.poll()
         intro.update(dt)
-        intro.draw(screen)
+        cube_x, cube_y = cube.draw_position(timestep.alpha)
+        camera.follow(cube_x + cube.size / 2, cube_y + cube.size / 2)
+        with profiler.phase("particles"):
+            effects.update(dt, *level.tile_window())
+        world = scaler.target(screen) if adaptive_resolution else screen
+        if world is not screen:
+            # Reduced resolution: draw the world small, stretch it to the
+            # display, then draw the overlays at full resolution on top.
+            scale = scaler.scale
+            with profiler.phase("level.draw"):
+                if level.scrolls:
+                    level.stream(camera.rect)
+                    level.draw(world, camera, scale)
+                else:
+                    world.blit(level.compose_static(current_level, draw_background, scale), (0, 0))
+            with profiler.phase("cube.draw"):
+                cube.draw(world, timestep.alpha, camera.offset, scale)
+            with profiler.phase("particles.draw"):
+                effects.draw(world, camera.offset, scale)
+            with profiler.phase("upscale"):
+                scaler.upscale(world, screen)
+            with profiler.phase("intro.draw"):
+                intro.draw(screen)
+        elif level.scrolls:
+            # Scrolling levels redraw every frame from the visible chunks.
+            with profiler.phase("level.draw"):
+                level.stream(camera.rect)
+                level.draw(screen, camera)
+            with profiler.phase("cube.draw"):
+                cube.draw(screen, timestep.alpha, camera.offset)
+            with profiler.phase("particles.draw"):
+                effects.draw(screen, camera.offset)
+            with profiler.phase("intro.draw"):
+                intro.draw(screen)
+        elif dirty_rendering and not menu.visible:
+            with profiler.phase("restore"):
+                renderer.set_background(level.compose_static(current_level, draw_background))
+                renderer.begin_frame()
+            with profiler.phase("cube.draw"):
+                renderer.mark(cube.draw(screen, timestep.alpha))
+            with profiler.phase("particles.draw"):
+                renderer.mark(effects.draw(screen))
+            with profiler.phase("intro.draw"):
+                renderer.mark(intro.draw(screen))
+        else:
+            with profiler.phase("draw_background"):
+                if draw_background:
+                    level.draw_background(screen)
 
-    menu.draw(screen)
+            with profiler.phase("draw_spikes"):
+                level.draw_spikes(screen, current_level)      
+            with profiler.phase("level.draw"):
+                level.draw(screen)
+            with profiler.phase("cube.draw"):
+                cube.draw(screen, timestep.alpha)
+            with profiler.phase("particles.draw"):
+                effects.draw(screen)
+            with profiler.phase("intro.draw"):
+                intro.draw(screen)
 
-    fps = int(1000 / max(1, dtfps))
-    _draw_small_number(screen, str(max(0, int(fps))), (14, 8), scale=4, color=RED)
+    with profiler.phase("menu.draw"):
+        menu.draw(screen)
 
+    with profiler.phase("hud"):
+        fps = int(1000 / max(1, dtfps))
+        fps_rect = fps_text.draw(screen, str(max(0, int(fps))), (14, 8))
+        profile_rect = profiler.draw(screen, profile_font) if profiler.enabled else None
 
+    with profiler.phase("present"):
+        if (dirty_rendering and current_level is not None and not menu.visible
+                and not level.scrolls and world is screen):
+            renderer.mark(fps_rect)
+            renderer.mark(profile_rect)
+            renderer.present()
+        else:
+            renderer.invalidate()
+            pygame.display.flip()
+
+    if adaptive_resolution and current_level is not None and not menu.visible:
+        scaler.record(time.perf_counter() - frame_start)
+
+    if startup.to_menu is None:
+        # The first frame is up: note the time to menu, then start what a
+        # fast start deferred.
+        startup.menu_shown()
+        if args.startup_trace:
+            startup.save(args.startup_trace)
+        if args.quit_at_menu:
+            running = False
+        elif not audio.initialized:
+            start_audio()
 
-    pygame.display.flip()
+    profiler.end_frame()
 
+if recorder:
+    recorder.finish(current_level, cube)
+    recorder.replay.save(args.record)
+prefetcher.shutdown()
+if watcher is not None:
+    watcher.shutdown()
 pygame.quit()
 sys.exit()
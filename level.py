@@ -1,58 +1,144 @@
+import os
+from collections import namedtuple
 import pygame
-from utils import svg_to_surface
+import levelfile
+from assets import registry
+from collision import (CollisionMap, Contacts, DistanceIndex,
+                       SOLID, HAZARD, GOAL, solid_from_surface)
 from constants import SCREEN_WIDTH, SCREEN_HEIGHT
 
 
+def _layer(svg_path):
+    """Boolean [y, x] occupancy of a full-screen SVG layer, shared across levels."""
+    return registry.get(
+        ("layer", svg_path, SCREEN_WIDTH, SCREEN_HEIGHT, "fill"),
+        lambda: solid_from_surface(registry.surface(
+            svg_path, width=SCREEN_WIDTH, height=SCREEN_HEIGHT, scale_mode="fill")),
+        lambda layer: layer.nbytes,
+    )
+
+
+def _forget(svg_path):
+    """Drop everything the registry derived from `svg_path`, so it is re-rasterised."""
+    for kind in ("surface", "layer", "distance_index"):
+        registry.discard((kind, svg_path, SCREEN_WIDTH, SCREEN_HEIGHT, "fill"))
+
+
+# Roles of the files a level is drawn and collided from (see Level.build_layer).
+LEVEL_LAYER = "level"
+SPIKES_LAYER = "spikes"
+BACKGROUND_LAYER = "background"
+GOAL_LAYER = "goal"
+
+# One re-rasterised layer: its image and/or occupancy, and for the level layer
+# the solid distance index. None fields mean the file was removed.
+LayerUpdate = namedtuple("LayerUpdate", "role image occupancy distance_index")
+
+
 class Level:
     """Draws a full-screen SVG level and provides pixel-perfect collision detection."""
 
-    def __init__(self, svg_path: str):
-        # Convert SVG to full screen surface
-        self.image = svg_to_surface(
+    # Screen-sized levels never scroll; see chunked.ChunkedLevel for ones that do.
+    scrolls = False
+
+    def __init__(self, svg_path: str, level_number: int = None):
+        self.width = SCREEN_WIDTH
+        self.height = SCREEN_HEIGHT
+        self.spikes_image = None
+        self.spikes_level_number = None
+        self._mask = None
+        self._static = None
+        self._static_key = None
+        self._scaled_static = {}
+
+        # A compiled level file (see compile_levels.py) skips SVG rasterisation
+        # entirely; the SVGs remain the fallback when it is missing or stale.
+        compiled = levelfile.load(level_number) if level_number is not None else None
+        if compiled is not None:
+            self._load_compiled(compiled, level_number)
+            return
+
+        # Convert SVG to full screen surface (shared through the asset registry)
+        self.image = registry.surface(
             svg_path,
             width=SCREEN_WIDTH,
             height=SCREEN_HEIGHT,
             scale_mode="fill"
         )
-        self.spikes_image = None
-        self.spikes_level_number = None
-        self.spikes_mask = None
-        
-        # Create a mask for collision detection from the SVG surface.
-        # Non-transparent pixels (alpha > 0) are considered solid.
-        self.mask = pygame.mask.from_surface(self.image)
-        self._rect_mask_cache = {}
-        # Cache a background image (if present) so we don't re-render SVG every frame.
+
+        # Typed collision map (solid / hazard / goal bits per pixel). The solid
+        # layer's distance index is shared by every Level built from this SVG.
+        solid = _layer(svg_path)
+        distance_index = registry.get(
+            ("distance_index", svg_path, SCREEN_WIDTH, SCREEN_HEIGHT, "fill"),
+            lambda: DistanceIndex(solid),
+            lambda index: index.nbytes,
+        )
+        self.collision = CollisionMap.from_layers(
+            SCREEN_WIDTH, SCREEN_HEIGHT, solid=solid, distance_index=distance_index)
+
+        # The background is identical for every level, so all levels share one copy.
         try:
-            self.bg_image = svg_to_surface("assets/Backgrounds/bg.svg", width=SCREEN_WIDTH, height=SCREEN_HEIGHT, scale_mode="fill")
+            self.bg_image = registry.surface("assets/Backgrounds/bg.svg", width=SCREEN_WIDTH, height=SCREEN_HEIGHT, scale_mode="fill")
         except Exception:
             self.bg_image = None
 
+        # Load the spikes and goal layers up front when the level number is
+        # known, so a level built off the main thread is complete when swapped in.
+        if level_number is not None:
+            self.load_spikes(level_number)
+            self.load_goal(level_number)
+
+    def _load_compiled(self, compiled, level_number: int):
+        # The mapped layers are RGBA byte order; convert once for fast blits
+        # (headless there is no display format, so use them as they are).
+        def convert(surface):
+            if surface is None or pygame.display.get_surface() is None:
+                return surface
+            return surface.convert_alpha()
+
+        self.image = convert(compiled.image)
+        self.bg_image = convert(compiled.bg_image)
+        self.spikes_image = convert(compiled.spikes_image)
+        self.spikes_level_number = level_number
+        self.collision = compiled.collision
+
+    @property
+    def revision(self) -> int:
+        """Changes whenever a collision layer is replaced."""
+        return self.collision.revision
+
+    @property
+    def mask(self) -> pygame.mask.Mask:
+        """Pixel mask of the level image (alpha > 127 is solid), built on first use."""
+        if self._mask is None:
+            self._mask = pygame.mask.from_surface(self.image)
+        return self._mask
+
     def draw(self, surface: pygame.Surface):
         surface.blit(self.image, (0, 0))
 
+    def tile_window(self, rect=None):
+        """Return ``(tiles, (0, 0))``: the whole level's tile bits and their origin."""
+        return self.collision.tiles, (0, 0)
+
     def get_collisions(self, rect: pygame.Rect) -> bool:
         """Check if the given rect overlaps any non-transparent pixels in the level."""
-        if not rect.colliderect(self.image.get_rect()):
-            return False
-        
-        # Get the intersection of the cube's rect and the level bounds
-        level_rect = self.image.get_rect()
-        intersection = rect.clip(level_rect)
-        
-        if intersection.width <= 0 or intersection.height <= 0:
-            return False
+        return self.collision.touches(SOLID, rect)
 
-        size_key = (rect.width, rect.height)
-        rect_mask = self._rect_mask_cache.get(size_key)
-        if rect_mask is None:
-            rect_mask = pygame.mask.Mask(size_key, fill=True)
-            self._rect_mask_cache[size_key] = rect_mask
+    def sense(self, rect: pygame.Rect) -> Contacts:
+        """Return every contact flag for `rect` in one call.
 
-        try:
-            return self.mask.overlap(rect_mask, (rect.x, rect.y)) is not None
-        except (IndexError, ValueError):
-            return False
+        left/right/ground/ceiling are true when moving one pixel that way
+        would touch the level; hazard when `rect` overlaps spikes; goal when
+        it overlaps the goal layer (the right edge unless a goal SVG exists).
+        """
+        return self.collision.sense(rect)
+
+    def sweep(self, rect: pygame.Rect, axis: str, direction: int):
+        """Return how many pixels `rect` can move along `axis` ("x"/"y") in
+        `direction` (+1/-1) before touching the level, or UNBOUNDED."""
+        return self.collision.sweep(rect, axis, direction)
 
     def resolve_collision(self, rect: pygame.Rect, velocity) -> tuple:
         """Resolve collision and return adjusted position and velocity.
@@ -64,48 +150,116 @@ class Level:
         
         # Simple resolution: push upward until no collision
         # (works for landing on platforms from above)
-        x, y = rect.x, rect.y
-        test_rect = pygame.Rect(x, y, rect.width, rect.height)
-        
-        # Try moving up pixel by pixel until clear
-        for i in range(1, rect.height + 10):
-            test_rect.y = y - i
-            if not self.get_collisions(test_rect):
-                return x, y - i, 0
+        y = self.collision.distance_index.lift(rect, rect.height + 9)
+        if y is not None:
+            return rect.x, y, 0
         
-        return x, y, velocity
+        return rect.x, rect.y, velocity
     
     def draw_background(self, surface: pygame.Surface):
         """Draw just the background layer of the level /assets/bg.svg"""
         if self.bg_image:
             surface.blit(self.bg_image, (0, 0))
 
-    def draw_spikes(self, surface: pygame.Surface, level_number: int):
-        if self.spikes_image is None or self.spikes_level_number != level_number:
+    def load_spikes(self, level_number: int):
+        """Load (or reuse) the spikes layer and its hazard bits for `level_number`."""
+        if self.spikes_level_number != level_number:
+            spikes_path = f"assets/Obstacles/Spikes{level_number}.svg"
             try:
-                self.spikes_image = svg_to_surface(
-                    f"assets/Obstacles/Spikes{level_number}.svg",
+                self.spikes_image = registry.surface(
+                    spikes_path,
                     width=SCREEN_WIDTH,
                     height=SCREEN_HEIGHT,
                     scale_mode="fill"
-                ).convert_alpha()
-
-                # 🔥 Create mask once
-                self.spikes_mask = pygame.mask.from_surface(self.spikes_image)
-
-                self.spikes_level_number = level_number
+                )
+                self.collision.set_layer(HAZARD, _layer(spikes_path))
             except Exception:
                 self.spikes_image = None
-                self.spikes_mask = None
+                self.collision.set_layer(HAZARD, None)
+            # Remember failures too, so a missing layer isn't retried every frame.
+            self.spikes_level_number = level_number
+
+    def load_goal(self, level_number: int):
+        """Use assets/Goals/Goal{n}.svg as the goal layer if it exists."""
+        goal_path = f"assets/Goals/Goal{level_number}.svg"
+        if os.path.exists(goal_path):
+            self.collision.set_layer(GOAL, _layer(goal_path))
+
+    @staticmethod
+    def build_layer(role, svg_path):
+        """Re-rasterise one layer file after it changed and rebuild only what
+        depends on it. Safe off the main thread: nothing live is touched, the
+        result is swapped in by apply_layer(). Returns None if the level
+        layer itself is missing (it is kept as it was)."""
+        _forget(svg_path)
+        exists = os.path.exists(svg_path)
+        if role == LEVEL_LAYER and not exists:
+            return None
+        image = occupancy = distance_index = None
+        if exists and role != GOAL_LAYER:
+            image = registry.surface(svg_path, width=SCREEN_WIDTH, height=SCREEN_HEIGHT, scale_mode="fill")
+        if exists and role != BACKGROUND_LAYER:
+            occupancy = _layer(svg_path)
+        if role == LEVEL_LAYER:
+            distance_index = registry.get(
+                ("distance_index", svg_path, SCREEN_WIDTH, SCREEN_HEIGHT, "fill"),
+                lambda: DistanceIndex(occupancy),
+                lambda index: index.nbytes,
+            )
+        return LayerUpdate(role, image, occupancy, distance_index)
 
+    def apply_layer(self, update):
+        """Swap in a layer from build_layer(); only cheap assignments and one
+        tile-bit rewrite, so it can run between frames."""
+        if update.role == LEVEL_LAYER:
+            self.image = update.image
+            self._mask = None
+            self.collision.set_layer(SOLID, update.occupancy, update.distance_index)
+        elif update.role == SPIKES_LAYER:
+            self.spikes_image = update.image
+            self.collision.set_layer(HAZARD, update.occupancy)
+        elif update.role == BACKGROUND_LAYER:
+            self.bg_image = update.image
+        elif update.role == GOAL_LAYER:
+            self.collision.set_layer(GOAL, update.occupancy)
+        # Recomposite the static layers on next use.
+        self._static_key = None
+
+    def compose_static(self, level_number: int, draw_background: bool = True, scale: float = 1.0) -> pygame.Surface:
+        """Return the background, spikes and level layers flattened into one
+        opaque surface, built once per level and reused every frame.
+
+        Below `scale` 1 a smoothly downscaled copy is returned, kept per scale.
+        """
+        key = (level_number, draw_background)
+        if self._static_key != key:
+            self.load_spikes(level_number)
+            static = pygame.Surface(self.image.get_size()).convert()
+            static.fill((0, 0, 0))
+            if draw_background:
+                self.draw_background(static)
+            if self.spikes_image:
+                static.blit(self.spikes_image, (0, 0))
+            self.draw(static)
+            self._static = static
+            self._static_key = key
+            self._scaled_static = {}
+        if scale == 1.0:
+            return self._static
+        scaled = self._scaled_static.get(scale)
+        if scaled is None:
+            w, h = self._static.get_size()
+            scaled = pygame.transform.smoothscale(self._static, (int(w * scale), int(h * scale)))
+            self._scaled_static[scale] = scaled
+        return scaled
+
+    def draw_spikes(self, surface: pygame.Surface, level_number: int):
+        self.load_spikes(level_number)
         if self.spikes_image:
             surface.blit(self.spikes_image, (0, 0))
 
     def touching_spikes(self, rect: pygame.Rect) -> bool:
-        if not self.spikes_mask:
-            return False
+        return self.collision.touches(HAZARD, rect)
 
-        return self.spikes_mask.overlap(
-            pygame.mask.Mask((rect.width, rect.height), fill=True),
-            (rect.x, rect.y)
-        ) is not None
\ No newline at end of file
+    def touching_goal(self, rect: pygame.Rect) -> bool:
+        return self.collision.touches(GOAL, rect)
@@ -0,0 +1,190 @@
+# compact binary level format: pre-rasterised layers + RLE collision map
+import mmap
+import os
+import struct
+import zlib
+import numpy as np
+import pygame
+from collision import CollisionMap, DistanceIndex
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from raster_cache import RENDERER_VERSION
+
+# File layout (little-endian):
+#   header   "<4sHHHHH"  magic, version, width, height, section count,
+#            renderer version
+#   table    "<QQ" per section: byte offset and length (0 = absent)
+#   sections raw RGBA layers, the RLE tile runs and the zlib-compressed
+#            distance tables, each starting on a 64-byte boundary so the
+#            layers can be mapped in place
+#
+# The four int16 distance tables are ~16 MB raw but long runs of counting
+# distances, so they compress to well under 1 MB. Inflating them costs
+# ~35 ms at load, against ~80 ms to rebuild them from the solid layer.
+MAGIC = b"FLVL"
+VERSION = 2
+
+# Distance tables are inflated on every load, so favour decompression speed.
+_DISTANCE_COMPRESSION = 1
+
+LEVEL, SPIKES, BACKGROUND, TILES, DISTANCE = range(5)
+SECTION_COUNT = 5
+
+_HEADER = struct.Struct("<4sHHHHH")
+_SECTION = struct.Struct("<QQ")
+_ALIGN = 64
+
+COMPILED_DIR = "assets/Compiled"
+
+# When False, load() always misses, so levels are rasterised from their SVGs.
+enabled = True
+
+
+def compiled_path(level_number):
+    return os.path.join(COMPILED_DIR, f"Level{level_number}.lvl")
+
+
+def source_paths(level_number):
+    """SVG files a compiled level is built from (missing ones are skipped)."""
+    paths = [
+        f"assets/Levels/Level{level_number}.svg",
+        f"assets/Obstacles/Spikes{level_number}.svg",
+        "assets/Backgrounds/bg.svg",
+        f"assets/Goals/Goal{level_number}.svg",
+    ]
+    return [path for path in paths if os.path.exists(path)]
+
+
+def is_fresh(level_number):
+    """True if a compiled file exists, is newer than every source SVG and was
+    built by this format, renderer version and screen size."""
+    path = compiled_path(level_number)
+    try:
+        compiled_mtime = os.path.getmtime(path)
+        with open(path, "rb") as f:
+            header = _HEADER.unpack(f.read(_HEADER.size))
+    except (OSError, struct.error):
+        return False
+    magic, version, width, height, _, renderer_version = header
+    if (magic, version, renderer_version) != (MAGIC, VERSION, RENDERER_VERSION):
+        return False
+    if (width, height) != (SCREEN_WIDTH, SCREEN_HEIGHT):
+        return False
+    return all(os.path.getmtime(path) <= compiled_mtime for path in source_paths(level_number))
+
+
+def encode_runs(tiles):
+    """Run-length encode a uint8 array as ``(values uint8, lengths uint32)``."""
+    flat = tiles.ravel()
+    if flat.size == 0:
+        return np.zeros(0, np.uint8), np.zeros(0, np.uint32)
+    starts = np.concatenate(([0], np.flatnonzero(flat[1:] != flat[:-1]) + 1))
+    lengths = np.diff(np.concatenate((starts, [flat.size])))
+    return flat[starts].astype(np.uint8), lengths.astype(np.uint32)
+
+
+def decode_runs(values, lengths, shape):
+    return np.repeat(values, lengths).reshape(shape)
+
+
+def write(path, width, height, layers, collision_map):
+    """Write a compiled level.
+
+    `layers` maps LEVEL/SPIKES/BACKGROUND to raw RGBA bytes of width x height.
+    """
+    values, lengths = encode_runs(collision_map.tiles)
+    index = collision_map.distance_index
+    sections = {section: data for section, data in layers.items() if data is not None}
+    sections[TILES] = struct.pack("<I", len(values)) + values.tobytes() + lengths.tobytes()
+    sections[DISTANCE] = zlib.compress(b"".join(
+        table.tobytes() for table in (index.next_x, index.prev_x, index.next_y, index.prev_y)),
+        _DISTANCE_COMPRESSION)
+
+    table = []
+    offset = _HEADER.size + _SECTION.size * SECTION_COUNT
+    for section in range(SECTION_COUNT):
+        data = sections.get(section)
+        if data is None:
+            table.append((0, 0))
+            continue
+        offset = -(-offset // _ALIGN) * _ALIGN
+        table.append((offset, len(data)))
+        offset += len(data)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, width, height, SECTION_COUNT, RENDERER_VERSION))
+        for entry in table:
+            f.write(_SECTION.pack(*entry))
+        for section, (start, length) in enumerate(table):
+            if length:
+                f.write(b"\0" * (start - f.tell()))
+                f.write(sections[section])
+    os.replace(tmp_path, path)
+
+
+class CompiledLevel:
+    """A compiled level file mapped into memory.
+
+    Layer surfaces share the mapped pages (call convert_alpha() for fast
+    blitting); the collision map's distance tables are inflated into memory.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, width, height, count, _ = _HEADER.unpack_from(self._mapped, 0)
+        if magic != MAGIC or version != VERSION or count != SECTION_COUNT:
+            raise ValueError(f"'{path}' is not a version {VERSION} compiled level")
+        self.width = width
+        self.height = height
+        self._sections = [
+            _SECTION.unpack_from(self._mapped, _HEADER.size + i * _SECTION.size)
+            for i in range(count)
+        ]
+
+        self.image = self._surface(LEVEL)
+        self.spikes_image = self._surface(SPIKES)
+        self.bg_image = self._surface(BACKGROUND)
+        self.collision = self._collision_map()
+
+    def _section(self, section):
+        offset, length = self._sections[section]
+        if not length:
+            return None
+        return memoryview(self._mapped)[offset:offset + length]
+
+    def _surface(self, section):
+        data = self._section(section)
+        if data is None:
+            return None
+        return pygame.image.frombuffer(data, (self.width, self.height), "RGBA")
+
+    def _collision_map(self):
+        shape = (self.height, self.width)
+        offset, _ = self._sections[TILES]
+        (run_count,) = struct.unpack_from("<I", self._mapped, offset)
+        values = np.frombuffer(self._mapped, np.uint8, run_count, offset + 4)
+        lengths = np.frombuffer(self._mapped, np.uint32, run_count, offset + 4 + run_count)
+        tiles = decode_runs(values, lengths, shape)
+
+        distances = zlib.decompress(self._section(DISTANCE))
+        cells = self.width * self.height
+        tables = []
+        for i in range(4):
+            table_shape = (self.width, self.height) if i < 2 else shape
+            table = np.frombuffer(distances, np.int16, cells, i * cells * 2)
+            tables.append(table.reshape(table_shape))
+        return CollisionMap(tiles, DistanceIndex.from_tables(*tables))
+
+
+def load(level_number):
+    """Return the compiled level if it exists and is up to date, else None."""
+    if not enabled or not is_fresh(level_number):
+        return None
+    try:
+        return CompiledLevel(compiled_path(level_number))
+    except (OSError, ValueError, struct.error, zlib.error) as e:
+        print(f"Error loading compiled level {level_number}: {e}")
+        return None
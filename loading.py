@@ -0,0 +1,21 @@
+# progress screen shown while the asset manifest is preloaded
+import pygame
+import glyphs
+from constants import BLACK, WHITE
+
+
+class LoadingScreen:
+    def __init__(self):
+        self.digits = glyphs.small_digits(scale=4, color=WHITE)
+
+    def draw(self, screen, progress):
+        """Draw a progress bar with the percentage above it; `progress` is 0..1."""
+        screen.fill(BLACK)
+        area = screen.get_rect()
+        bar = pygame.Rect(0, 0, area.width // 2, 24)
+        bar.center = area.center
+        pygame.draw.rect(screen, WHITE, bar, 2)
+        filled = bar.inflate(-8, -8)
+        filled.width = int(filled.width * max(0.0, min(1.0, progress)))
+        screen.fill(WHITE, filled)
+        self.digits.draw(screen, str(int(progress * 100)), center=(bar.centerx, bar.top - 30))
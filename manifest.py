@@ -0,0 +1,68 @@
+# asset manifest: every file the game loads at startup or per level, and at what size
+import glob
+import os
+from collections import namedtuple
+import levelfile
+from chunked import is_scrolling, world_size
+from compile_levels import level_numbers
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, LEVEL_CHUNK_SIZE
+
+SVG = "svg"        # rasterised whole: width, height, scale_mode
+REGION = "region"  # one chunk of a scrolling level: width, height is the world size
+SOUND = "sound"    # decoded into a pygame Sound
+MUSIC = "music"    # streamed by pygame.mixer.music, never decoded up front
+FONT = "font"      # a SysFont face: path is the family name, width the point size
+
+Asset = namedtuple("Asset", "kind path width height scale_mode region", defaults=(None, None, None, None))
+
+PLAYER_SIZE = 50
+
+
+def _screen_layer(path):
+    return Asset(SVG, path, SCREEN_WIDTH, SCREEN_HEIGHT, "fill")
+
+
+def _level_assets(level_number):
+    level_path = f"assets/Levels/Level{level_number}.svg"
+    layers = [path for path in levelfile.source_paths(level_number)
+              if path != "assets/Backgrounds/bg.svg"]
+
+    if is_scrolling(level_path):
+        # Only the chunks of the opening screen; the rest stream in around
+        # the camera while the level is played.
+        w, h = world_size(level_path)
+        size = LEVEL_CHUNK_SIZE
+        regions = []
+        for cy in range(0, (min(SCREEN_HEIGHT, h) - 1) // size + 1):
+            for cx in range(0, (min(SCREEN_WIDTH + size, w) - 1) // size + 1):
+                x, y = cx * size, cy * size
+                regions.append((x, y, min(size, w - x), min(size, h - y)))
+        return [Asset(REGION, path, w, h, region=region) for path in layers for region in regions]
+
+    if levelfile.is_fresh(level_number):
+        # Compiled levels map their layers straight from the .lvl file.
+        return []
+    return [_screen_layer(path) for path in layers]
+
+
+def build_manifest():
+    """List every asset the game can load, in the order they are first needed."""
+    assets = [
+        Asset(SVG, "assets/player.svg", PLAYER_SIZE, PLAYER_SIZE, "fit"),
+        Asset(SVG, "assets/Text/Text.svg", SCREEN_WIDTH, SCREEN_HEIGHT, "contain"),
+        _screen_layer("assets/Backgrounds/bg.svg"),
+    ]
+    assets += [Asset(SOUND, path) for path in sorted(glob.glob("assets/Music/*.wav"))]
+    assets += [Asset(MUSIC, path) for path in sorted(glob.glob("assets/Music/*.mp3"))]
+    assets.append(Asset(FONT, "Arial", 40))  # level menu buttons
+    for n in level_numbers():
+        assets += _level_assets(n)
+    # Levels share layers (the background, repeated spikes); list each once.
+    return [asset for asset in dict.fromkeys(assets)
+            if asset.kind == FONT or os.path.exists(asset.path)]
+
+
+if __name__ == "__main__":
+    for asset in build_manifest():
+        size = f"{asset.width}x{asset.height}" if asset.width else ""
+        print(f"{asset.kind:7} {asset.path} {size} {asset.scale_mode or ''} {asset.region or ''}".rstrip())
@@ -1,11 +1,12 @@
 import pygame
+import glyphs
 from constants import SCREEN_WIDTH, SCREEN_HEIGHT
 
 
 class LevelMenu:
     def __init__(self):
         self.visible = True
-        self.font = pygame.font.SysFont("Arial", 40)
+        self.text = glyphs.sysfont("Arial", 40, (255, 255, 255))
         self.overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
         self.overlay.fill((0, 0, 0))
         self.overlay.set_alpha(255)
@@ -60,11 +61,14 @@ class LevelMenu:
             return
 
         self._ensure_overlay_size(screen.get_size())
-        screen.blit(self.overlay, (0, 0))
+        if self.overlay.get_alpha() == 255:
+            # An opaque overlay is a plain fill, far cheaper than an alpha blit.
+            screen.fill(self.overlay.get_at((0, 0)))
+        else:
+            screen.blit(self.overlay, (0, 0))
 
         # draw buttons
         for rect, level_num in self.buttons:
             pygame.draw.rect(screen, (70, 70, 200), rect, border_radius=10)
 
-            text = self.font.render(f"Level {level_num}", True, (255, 255, 255))
-            screen.blit(text, text.get_rect(center=rect.center))
+            self.text.draw(screen, f"Level {level_num}", center=rect.center)
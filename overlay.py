@@ -0,0 +1,54 @@
+# fading overlays (intro text, and later death / level-complete screens)
+
+
+class FadeOverlay:
+    """Fades an image between two alpha values over `duration` seconds.
+
+    The image is cropped once to the bounding box of its visible pixels
+    (unless `crop` is False because the caller already did) and faded by
+    changing that copy's surface alpha in place, so no frame ever
+    copies or allocates a surface. Once a fade-out finishes the copy is
+    released and update/draw do nothing.
+    """
+
+    def __init__(self, surface, duration, start_alpha=255, end_alpha=0, pos=(0, 0), crop=True):
+        self.duration = duration
+        self.start_alpha = start_alpha
+        self.end_alpha = end_alpha
+        self.alpha = start_alpha
+        self.image = None
+        self.rect = None
+        if surface is not None:
+            # The source may be shared (asset registry), so fade a private
+            # copy of just the visible part.
+            bounds = surface.get_bounding_rect() if crop else surface.get_rect()
+            self.image = surface.subsurface(bounds).copy()
+            self.rect = bounds.move(pos)
+            self.image.set_alpha(int(start_alpha))
+
+    @property
+    def finished(self):
+        return self.alpha == self.end_alpha
+
+    def update(self, dt):
+        if self.image is None or self.finished:
+            return
+        if self.duration > 0:
+            step = (self.end_alpha - self.start_alpha) / self.duration * dt
+            alpha = self.alpha + step
+            # Clamp at the end value, whichever direction the fade runs.
+            if (step > 0) == (alpha > self.end_alpha):
+                alpha = self.end_alpha
+        else:
+            alpha = self.end_alpha
+        if int(alpha) != int(self.alpha):
+            self.image.set_alpha(int(alpha))
+        self.alpha = alpha
+        if self.finished and int(self.end_alpha) <= 0:
+            self.image = None
+
+    def draw(self, screen):
+        """Blit the overlay; returns the screen rect touched, or None when invisible."""
+        if self.image is None or int(self.alpha) <= 0:
+            return None
+        return screen.blit(self.image, self.rect)
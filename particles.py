@@ -0,0 +1,244 @@
+# vectorised particle effects: death bursts, landing dust, wall-slide sparks
+import numpy as np
+import pygame
+from collision import SOLID
+from constants import PARTICLE_BUDGET
+
+PARTICLE_DTYPE = np.dtype([
+    ("x", np.float32), ("y", np.float32),
+    ("vx", np.float32), ("vy", np.float32),
+    ("life", np.float32), ("max_life", np.float32),
+    ("color", np.uint8, 3),
+])
+
+_LOW_LANES = np.uint32(0x00FF00FF)
+_HIGH_LANES = np.uint32(0xFF00FF00)
+
+# Emission starts thinning out once this fraction of the budget is live.
+THIN_OUT_AT = 0.5
+
+
+class ParticleSystem:
+    """Particles in one structured array, integrated and drawn in bulk.
+
+    Live particles occupy the first `count` rows. update() moves them all
+    at once, bounces them off solid tiles of a CollisionMap and compacts out
+    the dead; draw() blends them into the target through surfarray.
+
+    The budget degrades gracefully: past THIN_OUT_AT of capacity each burst
+    emits proportionally fewer particles, at capacity new particles replace
+    the ones closest to dying rather than being dropped outright, and past
+    `detail_limit` live particles they are drawn one pixel wide.
+    """
+
+    def __init__(self, capacity=PARTICLE_BUDGET, gravity=2000.0, size=2, seed=None):
+        self.particles = np.zeros(capacity, dtype=PARTICLE_DTYPE)
+        self.capacity = capacity
+        self.count = 0
+        self.gravity = gravity
+        self.size = size
+        self.detail_limit = capacity // 5
+        self.restitution = 0.4
+        self.friction = 0.7
+        self.seed = seed
+        self._rng = None
+
+    @property
+    def rng(self):
+        # Created on first emit: numpy.random is slow to import.
+        if self._rng is None:
+            self._rng = np.random.default_rng(self.seed)
+        return self._rng
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def _budget(self, n):
+        """How many of `n` requested particles to actually emit."""
+        thin_from = int(self.capacity * THIN_OUT_AT)
+        if self.count > thin_from:
+            headroom = (self.capacity - self.count) / (self.capacity - thin_from)
+            n = int(n * headroom + self.rng.random())
+        return max(0, min(n, self.capacity))
+
+    def _allocate(self, n):
+        """Return a view of `n` free rows, recycling the oldest when full."""
+        free = self.capacity - self.count
+        if n > free:
+            # Drop the particles with the least life left to make room.
+            live = self.particles[:self.count]
+            keep = np.argsort(live["life"])[n - free:]
+            live[:len(keep)] = live[keep]
+            self.count = len(keep)
+        rows = self.particles[self.count:self.count + n]
+        self.count += n
+        return rows
+
+    def emit(self, x, y, n, speed=(100, 400), angle=(0, 360), life=(0.4, 1.0),
+             color=(255, 255, 255), spread=0.0):
+        """Emit up to `n` particles from (x, y) with random speed/angle/life ranges.
+
+        Angles are degrees, 0 pointing right and 90 down (screen coordinates).
+        """
+        n = self._budget(n)
+        if n == 0:
+            return 0
+        rng = self.rng
+        rows = self._allocate(n)
+        theta = np.radians(rng.uniform(angle[0], angle[1], n))
+        v = rng.uniform(speed[0], speed[1], n)
+        rows["x"] = x + rng.uniform(-spread, spread, n)
+        rows["y"] = y + rng.uniform(-spread, spread, n)
+        rows["vx"] = np.cos(theta) * v
+        rows["vy"] = np.sin(theta) * v
+        rows["life"] = rows["max_life"] = rng.uniform(life[0], life[1], n)
+        rows["color"] = color
+        return n
+
+    # Effects used by Cube.
+
+    def death_burst(self, x, y, color=(255, 60, 60)):
+        self.emit(x, y, 600, speed=(150, 900), life=(0.5, 1.4), color=color, spread=20)
+
+    def landing_dust(self, x, y, impact_speed):
+        n = int(min(80, impact_speed / 20))
+        self.emit(x, y, n, speed=(40, 220), angle=(190, 350), life=(0.2, 0.5),
+                  color=(200, 200, 200), spread=20)
+
+    def wall_spark(self, x, y, wall_dir):
+        # Sparks fly away from the wall the cube is sliding down.
+        angle = (150, 210) if wall_dir > 0 else (-30, 30)
+        self.emit(x, y, 2, speed=(60, 240), angle=angle, life=(0.15, 0.35), color=(255, 210, 90))
+
+    def update(self, dt, tiles=None, origin=(0, 0)):
+        """Advance all particles by `dt`; bounce off SOLID bits in `tiles`.
+
+        `tiles` is a [y, x] tile array (CollisionMap.tiles, or a level's
+        tile_window()) whose top-left corner sits at world position `origin`.
+        Particles outside it fly freely; those falling below it are dropped.
+        """
+        if self.count == 0:
+            return
+        p = self.particles[:self.count]
+        p["life"] -= dt
+        p["vy"] += self.gravity * dt
+        old_x = p["x"].copy()
+        old_y = p["y"].copy()
+        p["x"] += p["vx"] * dt
+        p["y"] += p["vy"] * dt
+
+        alive = p["life"] > 0
+        if tiles is not None:
+            height, width = tiles.shape
+            left, top = origin
+            xi = p["x"].astype(np.int32) - left
+            yi = p["y"].astype(np.int32) - top
+            inside = (xi >= 0) & (xi < width) & (yi >= 0) & (yi < height)
+            hit = np.zeros(self.count, dtype=bool)
+            hit[inside] = (tiles[yi[inside], xi[inside]] & SOLID) != 0
+            if hit.any():
+                # If the old row is free at the new x, the particle hit a floor
+                # or ceiling; otherwise it ran into a wall.
+                idx = np.flatnonzero(hit)
+                hx = xi[idx]
+                old_row = np.clip(old_y[idx].astype(np.int32) - top, 0, height - 1)
+                horizontal_ok = (tiles[old_row, hx] & SOLID) == 0
+                floor = idx[horizontal_ok]
+                wall = idx[~horizontal_ok]
+                p["y"][floor] = old_y[floor]
+                p["vy"][floor] *= -self.restitution
+                p["vx"][floor] *= self.friction
+                p["x"][wall] = old_x[wall]
+                p["vx"][wall] *= -self.restitution
+            alive &= yi < height
+
+        survivors = np.count_nonzero(alive)
+        if survivors != self.count:
+            p[:survivors] = p[alive]
+            self.count = survivors
+
+    def draw(self, surface, offset=(0, 0), scale=1.0):
+        """Blend every particle into `surface`, shifted by -`offset` (the
+        camera position) and multiplied by `scale`; returns the rect touched,
+        or None."""
+        if self.count == 0:
+            return None
+        p = self.particles[:self.count]
+        width, height = surface.get_size()
+        # Past the detail limit particles shrink to single pixels, which
+        # keeps the cost roughly flat instead of growing with size squared.
+        size = self.size if self.count <= self.detail_limit else 1
+        size = max(1, round(size * scale))
+        x = p["x"].astype(np.int32) - offset[0]
+        y = p["y"].astype(np.int32) - offset[1]
+        if scale != 1.0:
+            x = (x * scale).astype(np.int32)
+            y = (y * scale).astype(np.int32)
+        on_screen = (x >= 0) & (x <= width - size) & (y >= 0) & (y <= height - size)
+        visible = np.flatnonzero(on_screen)
+        if not len(visible):
+            return None
+        x = x[visible]
+        y = y[visible]
+        # One gather of whole rows; masking each field separately is far slower.
+        q = p.take(visible)
+        # Fade out over the particle's life, in 0..128 fixed point.
+        fade = (q["life"] * 128 / q["max_life"]).astype(np.uint32)
+        keep = 128 - fade
+
+        # Target colour as whole pixels in the surface's format (opaque alpha),
+        # split into the 0x00FF00FF and 0xFF00FF00 byte lanes: each lane has
+        # 8 spare bits, so one multiply mixes two channels at once.
+        shifts = surface.get_shifts()[:3]
+        color = np.full(len(q), 0xFFFFFFFF & ~sum(0xFF << shift for shift in shifts), dtype=np.uint32)
+        rgb = q["color"]
+        for channel, shift in enumerate(shifts):
+            lane = rgb[:, channel].astype(np.uint32)
+            lane <<= np.uint32(shift)
+            color |= lane
+        color_rb = (color & _LOW_LANES) * fade
+        color_ag = ((color >> 8) & _LOW_LANES) * fade
+
+        # Blend straight into the surface through a flat [y * w + x] view of
+        # its pixels: gather every covered pixel, mix its bytes, scatter back.
+        base = y * width + x
+        pixels = pygame.surfarray.pixels2d(surface)
+        flat = None
+        try:
+            flat = pixels.T.reshape(-1)
+            if not np.shares_memory(flat, pixels):
+                # Padded rows can't be viewed as one array; go through pixels3d.
+                self._draw_pixels3d(surface, x, y, size, color, fade)
+            else:
+                for dy in range(size):
+                    for dx in range(size):
+                        at = base + (dy * width + dx)
+                        dst = flat[at]
+                        rb = (((dst & _LOW_LANES) * keep + color_rb) >> 7) & _LOW_LANES
+                        ag = ((((dst >> 8) & _LOW_LANES) * keep + color_ag) << 1) & _HIGH_LANES
+                        flat[at] = rb | ag
+        finally:
+            del pixels, flat
+
+        left, top = int(x.min()), int(y.min())
+        return pygame.Rect(left, top, int(x.max()) - left + size, int(y.max()) - top + size)
+
+    def _draw_pixels3d(self, surface, x, y, size, color, fade):
+        shifts = np.array(surface.get_shifts()[:3], dtype=np.uint32)
+        color = ((color[:, None] >> shifts) & 0xFF).astype(np.int16)
+        fade = fade.astype(np.int16)[:, None]
+        pixels = pygame.surfarray.pixels3d(surface)
+        try:
+            for dx in range(size):
+                for dy in range(size):
+                    dst = pixels[x + dx, y + dy].astype(np.int16)
+                    pixels[x + dx, y + dy] = dst + (((color - dst) * fade) >> 7)
+        finally:
+            del pixels
+
+
+# Shared by the cube (which emits) and the game loop (which updates and draws).
+effects = ParticleSystem()
@@ -0,0 +1,62 @@
+# builds upcoming levels on a worker thread while the current one is played
+import os
+from concurrent.futures import ThreadPoolExecutor
+from level import Level
+from chunked import ChunkedLevel, is_scrolling
+
+
+def level_path(level_number):
+    return f"assets/Levels/Level{level_number}.svg"
+
+
+def build_level(level_number):
+    """Build level n: a ChunkedLevel if it is wider than the screen, else a Level."""
+    path = level_path(level_number)
+    if is_scrolling(path):
+        return ChunkedLevel(path, level_number)
+    return Level(path, level_number=level_number)
+
+
+class LevelPrefetcher:
+    """Builds Level objects (surface, collision mask, spikes) in the background.
+
+    `request(n)` starts building level n; `take(n)` hands it over, waiting for
+    the worker if it is not finished yet, so swapping levels is just a
+    reference exchange on the main thread.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="level-prefetch")
+        self._pending = {}  # level number -> Future[Level]
+
+    def request(self, level_number):
+        if level_number in self._pending:
+            return
+        if not os.path.exists(level_path(level_number)):
+            return
+        self._pending[level_number] = self._executor.submit(self._build, level_number)
+
+    @staticmethod
+    def _build(level_number):
+        return build_level(level_number)
+
+    def take(self, level_number):
+        """Return the prefetched level, or None if it was never requested or failed."""
+        future = self._pending.pop(level_number, None)
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception as e:
+            print(f"Error prefetching level {level_number}: {e}")
+            return None
+
+    def retain(self, *level_numbers):
+        """Cancel or drop every prefetch that is not for one of `level_numbers`."""
+        for level_number in list(self._pending):
+            if level_number not in level_numbers:
+                self._pending.pop(level_number).cancel()
+
+    def shutdown(self):
+        self.retain()
+        self._executor.shutdown(wait=False, cancel_futures=True)
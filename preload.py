@@ -0,0 +1,127 @@
+# loads the asset manifest up front, rasterising SVGs across a pool of worker processes
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import deque
+import pygame
+import raster_cache
+from assets import registry
+from manifest import SVG, REGION, SOUND, FONT
+from utils import rasterize_svg, rasterize_svg_region, region_cache_key
+
+
+def _rasterize(asset):
+    """Worker: rasterise one manifest entry into the disk raster cache."""
+    if asset.kind == REGION:
+        rasterize_svg_region(asset.path, (asset.width, asset.height), asset.region)
+    else:
+        rasterize_svg(asset.path, asset.width, asset.height, asset.scale_mode)
+    return asset
+
+
+def _is_cached(asset):
+    if asset.kind == REGION:
+        key = region_cache_key(asset.path, (asset.width, asset.height), asset.region)
+    else:
+        key = raster_cache.cache_key(asset.path, asset.width, asset.height, asset.scale_mode)
+    return raster_cache.contains(key)
+
+
+def _pool(workers):
+    # Forked, not spawned: index.py is a plain script that a spawned worker
+    # would run again. Without fork, fall back to threads.
+    if "fork" in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork"))
+    return ThreadPoolExecutor(workers, thread_name_prefix="preload")
+
+
+class Preloader:
+    """Loads every manifest asset before the first interactive frame.
+
+    `start()` hands the SVGs missing from the disk raster cache to one worker
+    process per core (cairosvg is CPU-bound, so startup scales with cores).
+    Call it before pygame.display.set_mode() so the workers fork from a
+    process without a window. The main thread then calls `poll()` between
+    loading-screen frames: finished rasters are mapped from the cache into
+    the asset registry (converting needs the display), and sounds and fonts
+    are decoded, for at most `budget` seconds per call.
+    """
+
+    def __init__(self, assets, workers=None):
+        self.assets = list(assets)
+        self.workers = workers or os.cpu_count() or 1
+        self.loaded = 0
+        self.started_at = None
+        self.elapsed = None
+        self._executor = None
+        self._futures = {}  # Future -> asset being rasterised
+        self._ready = deque()  # assets left to decode on the main thread
+
+    @property
+    def total(self):
+        return len(self.assets)
+
+    @property
+    def progress(self):
+        return self.loaded / self.total if self.assets else 1.0
+
+    @property
+    def done(self):
+        return self.loaded >= self.total
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        misses = []
+        if raster_cache.enabled:
+            # Without the disk cache workers could not hand rasters back
+            # cheaply, so everything is then decoded on the main thread.
+            misses = [asset for asset in self.assets
+                      if asset.kind in (SVG, REGION) and not _is_cached(asset)]
+        if misses:
+            self._executor = _pool(min(self.workers, len(misses)))
+            self._futures = {self._executor.submit(_rasterize, asset): asset for asset in misses}
+        missing = set(misses)
+        self._ready.extend(asset for asset in self.assets if asset not in missing)
+
+    def poll(self, budget=0.008):
+        """Take in finished work for up to `budget` seconds; returns progress (0..1)."""
+        for future in [future for future in self._futures if future.done()]:
+            asset = self._futures.pop(future)
+            try:
+                future.result()
+            except Exception as e:
+                # Left for the first real use to retry (and report) as before.
+                print(f"Error preloading '{asset.path}': {e}")
+                self.loaded += 1
+                continue
+            self._ready.append(asset)
+
+        deadline = time.perf_counter() + budget
+        while self._ready and time.perf_counter() < deadline:
+            self._decode(self._ready.popleft())
+            self.loaded += 1
+
+        if self.done and self.elapsed is None:
+            self.elapsed = time.perf_counter() - self.started_at
+            self.shutdown()
+        return self.progress
+
+    @staticmethod
+    def _decode(asset):
+        try:
+            if asset.kind == SVG:
+                registry.surface(asset.path, asset.width, asset.height, asset.scale_mode)
+            elif asset.kind == SOUND and pygame.mixer.get_init():
+                registry.sound(asset.path)
+            elif asset.kind == FONT:
+                registry.font(asset.path, asset.width)
+            # REGION rasters stay on disk until their chunk is built; MUSIC streams.
+        except Exception as e:
+            print(f"Error preloading '{asset.path}': {e}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._futures.clear()
@@ -0,0 +1,150 @@
+# per-phase frame profiler: ring buffer of frames, percentiles, on-screen
+# summary and Chrome trace-event export (open in chrome://tracing or Perfetto)
+import json
+import time
+from collections import deque
+
+PROFILER_FRAMES = 600
+
+
+class _Phase:
+    __slots__ = ("phases", "name", "start")
+
+    def __init__(self, phases, name):
+        self.phases = phases
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.phases.append((self.name, self.start, time.perf_counter()))
+
+
+class _NullPhase:
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class FrameProfiler:
+    """Times named phases of each frame and counts hot-path calls.
+
+    Disabled, `phase()` returns a shared no-op context and `count()`
+    returns immediately, so the instrumentation can stay in the code.
+    """
+
+    def __init__(self, capacity=PROFILER_FRAMES):
+        self.enabled = False
+        self.frames = deque(maxlen=capacity)
+        self._frame = None
+
+    def begin_frame(self):
+        if self.enabled:
+            self._frame = {"start": time.perf_counter(), "phases": [], "counts": {}}
+
+    def end_frame(self):
+        frame = self._frame
+        if frame is not None:
+            frame["end"] = time.perf_counter()
+            self.frames.append(frame)
+            self._frame = None
+
+    def phase(self, name):
+        """Context manager timing `name` within the current frame."""
+        if self._frame is None:
+            return _NULL_PHASE
+        return _Phase(self._frame["phases"], name)
+
+    def count(self, name, n=1):
+        frame = self._frame
+        if frame is not None:
+            counts = frame["counts"]
+            counts[name] = counts.get(name, 0) + n
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        if not self.enabled:
+            self._frame = None
+
+    # -- reporting --------------------------------------------------------
+
+    def frame_times_ms(self):
+        return [(frame["end"] - frame["start"]) * 1000.0 for frame in self.frames]
+
+    def percentiles(self):
+        """Return ``(p50, p99, max)`` frame time in ms over the buffered frames."""
+        times = sorted(self.frame_times_ms())
+        if not times:
+            return 0.0, 0.0, 0.0
+
+        def pick(q):
+            return times[min(len(times) - 1, int(q * len(times)))]
+
+        return pick(0.50), pick(0.99), times[-1]
+
+    def phase_means(self):
+        """Return ``[(phase, mean ms per frame), ...]``, most expensive first."""
+        totals = {}
+        for frame in self.frames:
+            for name, start, end in frame["phases"]:
+                totals[name] = totals.get(name, 0.0) + (end - start)
+        n = max(1, len(self.frames))
+        return sorted(((name, total * 1000.0 / n) for name, total in totals.items()),
+                      key=lambda item: item[1], reverse=True)
+
+    def count_means(self):
+        totals = {}
+        for frame in self.frames:
+            for name, value in frame["counts"].items():
+                totals[name] = totals.get(name, 0) + value
+        n = max(1, len(self.frames))
+        return sorted((name, total / n) for name, total in totals.items())
+
+    def summary_lines(self):
+        p50, p99, worst = self.percentiles()
+        lines = [f"frame p50 {p50:.2f}  p99 {p99:.2f}  max {worst:.2f} ms ({len(self.frames)} frames)"]
+        lines += [f"{name:<16} {ms:6.3f} ms" for name, ms in self.phase_means()]
+        lines += [f"{name:<16} {value:8.1f} /frame" for name, value in self.count_means()]
+        return lines
+
+    def export_chrome_trace(self, path):
+        """Write the buffered frames as Chrome trace-event JSON."""
+        if not self.frames:
+            return
+        origin = self.frames[0]["start"]
+
+        def us(t):
+            return (t - origin) * 1e6
+
+        events = []
+        for frame in self.frames:
+            events.append({"name": "frame", "ph": "X", "pid": 0, "tid": 0,
+                           "ts": us(frame["start"]), "dur": us(frame["end"]) - us(frame["start"])})
+            for name, start, end in frame["phases"]:
+                events.append({"name": name, "ph": "X", "pid": 0, "tid": 0,
+                               "ts": us(start), "dur": us(end) - us(start)})
+            if frame["counts"]:
+                events.append({"name": "counts", "ph": "C", "pid": 0, "tid": 0,
+                               "ts": us(frame["start"]), "args": frame["counts"]})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def draw(self, surface, font, pos=(14, 40)):
+        """Draw the summary; returns the rect touched."""
+        x, y = pos
+        rect = None
+        for line in self.summary_lines():
+            text = font.render(line, True, (255, 255, 0), (0, 0, 0))
+            line_rect = surface.blit(text, (x, y))
+            rect = line_rect if rect is None else rect.union(line_rect)
+            y += text.get_height()
+        return rect
+
+
+profiler = FrameProfiler()
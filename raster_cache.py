@@ -0,0 +1,129 @@
+# content-addressed disk cache of rasterised SVGs (raw RGBA, memory-mapped on load)
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from constants import RASTER_CACHE_DIR, RASTER_CACHE_MAX_BYTES
+
+# Bump when rasterisation output changes so stale rasters are never reused.
+RENDERER_VERSION = 1
+
+_MAGIC = b"FRC1"
+_HEADER = struct.Struct("<4sII")
+_SUFFIX = ".rgba"
+
+enabled = True
+
+
+def cache_key(svg_path, width, height, scale_mode):
+    """Hash the SVG contents together with the requested output parameters."""
+    digest = hashlib.sha1()
+    with open(svg_path, "rb") as f:
+        digest.update(f.read())
+    digest.update(f"|{width}x{height}|{scale_mode}|v{RENDERER_VERSION}".encode())
+    return digest.hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(RASTER_CACHE_DIR, key + _SUFFIX)
+
+
+def load(key):
+    """Return ``(buffer, (w, h))`` for a cached raster, or None on a miss.
+
+    The buffer is a view into a read-only memory map of the cache file, so
+    it can be handed straight to ``pygame.image.frombuffer``.
+    """
+    path = _entry_path(key)
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(mapped) < _HEADER.size:
+        return None
+    magic, w, h = _HEADER.unpack_from(mapped, 0)
+    if magic != _MAGIC or len(mapped) != _HEADER.size + w * h * 4:
+        return None
+
+    try:
+        # Refresh the mtime so eviction drops the least recently used rasters.
+        os.utime(path)
+    except OSError:
+        pass
+    return memoryview(mapped)[_HEADER.size:], (w, h)
+
+
+def contains(key):
+    """True if a raster for `key` is on disk (without mapping it)."""
+    return os.path.exists(_entry_path(key))
+
+
+def store(key, data, size):
+    """Write raw RGBA bytes for `key`, then trim the cache to its size budget."""
+    w, h = size
+    path = _entry_path(key)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(RASTER_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, w, h))
+            f.write(data)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error writing raster cache entry '{path}': {e}")
+        return
+    evict()
+
+
+def _entries():
+    try:
+        names = os.listdir(RASTER_CACHE_DIR)
+    except OSError:
+        return []
+
+    entries = []
+    for name in names:
+        if not name.endswith(_SUFFIX):
+            continue
+        path = os.path.join(RASTER_CACHE_DIR, name)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+
+def evict(max_bytes=RASTER_CACHE_MAX_BYTES):
+    """Delete least recently used entries until the cache fits in `max_bytes`."""
+    entries = sorted(_entries())
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+
+
+def clear():
+    """Remove every cached raster."""
+    evict(0)
+
+
+def stats():
+    """Return ``(entry_count, total_bytes)`` for the cache directory."""
+    entries = _entries()
+    return len(entries), sum(size for _, size, _ in entries)
+
+
+if __name__ == "__main__":
+    if "--clear" in sys.argv[1:]:
+        clear()
+    count, total = stats()
+    print(f"{count} rasters, {total / (1024 * 1024):.1f} MiB in {RASTER_CACHE_DIR}")
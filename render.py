@@ -0,0 +1,51 @@
+# dirty-rectangle presentation over a pre-composited static background
+import pygame
+
+
+class DirtyRenderer:
+    """Redraws only the parts of the screen that moving things touched.
+
+    The static layers of a level are composited once into an opaque
+    background. Each frame `begin_frame()` restores last frame's dirty
+    regions from it, draw calls report what they touched through `mark()`,
+    and `present()` pushes just those regions with display.update().
+    """
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.background = None
+        self._previous = []
+        self._current = []
+        self._full_redraw = True
+
+    def set_background(self, background):
+        if background is not self.background:
+            self.background = background
+            self._full_redraw = True
+
+    def invalidate(self):
+        """Force the next frame to redraw and present the whole screen."""
+        self._full_redraw = True
+
+    def begin_frame(self):
+        if self._full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in self._previous:
+                self.screen.blit(self.background, rect, rect)
+        self._current = []
+
+    def mark(self, rect):
+        if rect:
+            rect = rect.clip(self.screen.get_rect())
+            if rect.width and rect.height:
+                self._current.append(rect)
+
+    def present(self):
+        if self._full_redraw:
+            pygame.display.flip()
+            self._full_redraw = False
+        else:
+            # Last frame's regions must be pushed too, to show them restored.
+            pygame.display.update(self._previous + self._current)
+        self._previous = self._current
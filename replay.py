@@ -0,0 +1,188 @@
+# compact input recordings and deterministic playback
+# python replay.py PATH plays a recording headless at full speed and exits 1
+# if it doesn't end the way the recorded session did.
+import hashlib
+import struct
+import sys
+import time
+from collections import namedtuple
+from constants import PHYSICS_TICK_RATE
+from cube import Inputs
+from sim import SPAWN, Simulation, cube_state, load_collision
+
+# File layout (little-endian):
+#   header  "<4sHHH"   magic, version, starting level number, physics tick rate
+#   outcome "<HIdd8s"  version 2 only: the expected Outcome
+#   body    one unsigned LEB128 varint per run: (run_length << 4) | input_bits
+# input_bits packs left/right/jump/down into bits 0-3. Replays without an
+# expected outcome are written as version 1.
+MAGIC = b"FRPL"
+VERSION = 2
+_HEADER = struct.Struct("<4sHHH")
+_OUTCOME = struct.Struct("<HIdd8s")
+_STATE = struct.Struct("<4d3?")
+
+# How a recorded session ended: the level it was on, deaths since recording
+# began, the cube's final position and a hash of its whole state (sim.cube_state).
+Outcome = namedtuple("Outcome", "level_number deaths x y state_hash")
+
+
+def pack_inputs(inputs):
+    return (inputs.left | inputs.right << 1 | inputs.jump << 2 | inputs.down << 3)
+
+
+def unpack_inputs(bits):
+    return Inputs(bool(bits & 1), bool(bits & 2), bool(bits & 4), bool(bits & 8))
+
+
+def state_hash(state):
+    """8-byte digest of a cube_state() tuple; equal only for bit-identical states."""
+    return hashlib.blake2b(_STATE.pack(*state), digest_size=8).digest()
+
+
+def outcome(level_number, deaths, state):
+    return Outcome(level_number, deaths, float(state[0]), float(state[1]), state_hash(state))
+
+
+class Replay:
+    """Per-tick input state of a play session, stored as runs of identical ticks,
+    and the Outcome playback should reproduce (`expected`, None if unknown)."""
+
+    def __init__(self, level_number, tick_rate=PHYSICS_TICK_RATE, runs=None, expected=None):
+        self.level_number = level_number
+        self.tick_rate = tick_rate
+        self.runs = runs if runs is not None else []  # [input_bits, run_length]
+        self.expected = expected
+
+    @property
+    def ticks(self):
+        return sum(length for _, length in self.runs)
+
+    def inputs(self):
+        """Yield one Inputs per recorded tick."""
+        for bits, length in self.runs:
+            tick_inputs = unpack_inputs(bits)
+            for _ in range(length):
+                yield tick_inputs
+
+    def to_bytes(self):
+        version = 1 if self.expected is None else VERSION
+        out = bytearray(_HEADER.pack(MAGIC, version, self.level_number, self.tick_rate))
+        if self.expected is not None:
+            out += _OUTCOME.pack(*self.expected)
+        for bits, length in self.runs:
+            value = length << 4 | bits
+            while True:
+                byte = value & 0x7F
+                value >>= 7
+                if value:
+                    out.append(byte | 0x80)
+                else:
+                    out.append(byte)
+                    break
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, level_number, tick_rate = _HEADER.unpack_from(data, 0)
+        if magic != MAGIC or not 1 <= version <= VERSION:
+            raise ValueError(f"not a version 1-{VERSION} replay")
+        start = _HEADER.size
+        expected = None
+        if version >= 2:
+            expected = Outcome(*_OUTCOME.unpack_from(data, start))
+            start += _OUTCOME.size
+        runs = []
+        value = shift = 0
+        for byte in data[start:]:
+            value |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                runs.append([value & 0xF, value >> 4])
+                value = shift = 0
+        return cls(level_number, tick_rate, runs, expected)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+class Recorder:
+    """Collects one Inputs per physics tick into a Replay.
+
+    `deaths` is the cube's death count when recording starts; `finish()`
+    stores how the session ended as the replay's expected outcome.
+    """
+
+    def __init__(self, level_number, tick_rate=PHYSICS_TICK_RATE, deaths=0):
+        self.replay = Replay(level_number, tick_rate)
+        self.deaths = deaths
+
+    def record(self, inputs):
+        bits = pack_inputs(inputs)
+        runs = self.replay.runs
+        if runs and runs[-1][0] == bits:
+            runs[-1][1] += 1
+        else:
+            runs.append([bits, 1])
+
+    def finish(self, level_number, cube):
+        """Record where the session ended: the current level and its cube."""
+        self.replay.expected = outcome(level_number, cube.deaths - self.deaths, cube_state(cube))
+
+
+# `mismatches` lists how playback differed from the replay's expected
+# outcome; it is empty when they agree or nothing was expected.
+PlaybackResult = namedtuple("PlaybackResult", "level_number ticks deaths state mismatches")
+
+
+def play_headless(replay, load=load_collision):
+    """Run a replay without a window as fast as possible.
+
+    Reaching the goal moves on to the next level exactly like
+    index.load_level; playback stops early if that level doesn't exist.
+    The end state is then checked against `replay.expected`.
+    """
+    level_number = replay.level_number
+    sim = Simulation(load(level_number), dt=1.0 / replay.tick_rate, start=SPAWN)
+    for tick_inputs in replay.inputs():
+        if sim.step(tick_inputs):
+            level_number += 1
+            try:
+                sim.collision = load(level_number)
+            except (OSError, ValueError):
+                break
+            sim.cube.teleport(*SPAWN)
+            sim.cube.velocity_x = 0
+            sim.cube.velocity_y = 0
+    state = sim.state()
+    mismatches = []
+    if replay.expected is not None:
+        actual = outcome(level_number, sim.cube.deaths, state)
+        mismatches = [f"{name}: recorded {want}, played {got}"
+                      for name, want, got in zip(Outcome._fields, replay.expected, actual)
+                      if want != got]
+    return PlaybackResult(level_number, sim.ticks, sim.cube.deaths, state, mismatches)
+
+
+if __name__ == "__main__":
+    replay = Replay.load(sys.argv[1])
+    start = time.perf_counter()
+    result = play_headless(replay)
+    elapsed = time.perf_counter() - start
+    print(f"{result.ticks} ticks ({result.ticks / replay.tick_rate:.1f}s of play) in {elapsed:.3f}s; "
+          f"level {result.level_number}, deaths {result.deaths}, state {result.state}")
+    if replay.expected is None:
+        print("no expected outcome recorded; nothing to check")
+    elif result.mismatches:
+        print("playback does not match the recording:")
+        for mismatch in result.mismatches:
+            print(f"  {mismatch}")
+        sys.exit(1)
+    else:
+        print("matches the recording")
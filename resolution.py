@@ -0,0 +1,90 @@
+# dynamic resolution: draw the world smaller when frames run over budget
+from collections import deque
+import pygame
+from constants import FPS
+
+# Render scales, best first. 0.75 and 0.5 keep 512 px level chunks whole.
+QUALITY_SCALES = (1.0, 0.75, 0.5)
+
+
+class ResolutionScaler:
+    """Picks a world render scale from recent frame times.
+
+    Frames are timed from the end of clock.tick() to after present, so the
+    limiter's sleep doesn't count. When the 90th percentile of the last
+    `window` frames runs over budget the scale drops a step; it only comes
+    back up once the same percentile, projected to the larger scale, fits
+    comfortably, and each failed step up doubles the wait before the next
+    try so the scale doesn't flicker between two levels. A step up that
+    holds for a whole window resets the wait.
+
+    At a scale below 1 the world is drawn into an internal surface of that
+    size (one per scale, kept) and stretched to the display with
+    pygame.transform.scale; UI is drawn at full resolution on top.
+    """
+
+    def __init__(self, target_fps=FPS, scales=QUALITY_SCALES, window=30):
+        self.budget = 1.0 / target_fps
+        self.scales = scales
+        self.level = 0
+        self.frame_times = deque(maxlen=window)
+        self._surfaces = {}
+        self.window = window
+        self._upgrade_wait = window
+        self._frames_since_change = 0
+        self._stepped_up = False
+
+    @property
+    def scale(self):
+        return self.scales[self.level]
+
+    def _percentile(self, fraction):
+        times = sorted(self.frame_times)
+        return times[min(len(times) - 1, int(len(times) * fraction))]
+
+    def _set_level(self, level):
+        self._stepped_up = level < self.level
+        self.level = level
+        self.frame_times.clear()
+        self._frames_since_change = 0
+
+    def record(self, frame_time):
+        """Add one frame's work time in seconds; may change `scale`."""
+        self.frame_times.append(frame_time)
+        self._frames_since_change += 1
+        if len(self.frame_times) < self.frame_times.maxlen:
+            return
+
+        slow = self._percentile(0.9)
+        if slow > self.budget * 0.95 and self.level < len(self.scales) - 1:
+            if self._stepped_up:
+                # Stepping up didn't hold; wait longer before trying again.
+                self._upgrade_wait *= 2
+            self._set_level(self.level + 1)
+            return
+        if self._stepped_up:
+            # A full window at the larger scale stayed in budget: it held.
+            self._stepped_up = False
+            self._upgrade_wait = self.window
+        if self.level > 0 and self._frames_since_change >= self._upgrade_wait:
+            # Pixel work grows with area, so project the cost at the larger scale.
+            projected = slow * (self.scales[self.level - 1] / self.scale) ** 2
+            if projected < self.budget * 0.8:
+                self._set_level(self.level - 1)
+
+    def target(self, screen):
+        """Surface to draw the world into this frame (the screen at full scale)."""
+        if self.level == 0:
+            return screen
+        scale = self.scale
+        surface = self._surfaces.get(scale)
+        if surface is None:
+            w, h = screen.get_size()
+            surface = pygame.Surface((int(w * scale), int(h * scale))).convert(screen)
+            self._surfaces[scale] = surface
+        return surface
+
+    def upscale(self, world, screen):
+        """Stretch the internal world surface over the whole screen."""
+        if world is not screen:
+            pygame.transform.scale(world, screen.get_size(), screen)
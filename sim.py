@@ -0,0 +1,75 @@
+# headless simulation core: Cube physics against a collision map, no window,
+# mixer or rendering. python sim.py [level] [steps] runs a quick throughput check.
+import sys
+import time
+import levelfile
+from constants import PHYSICS_TICK_RATE
+from cube import Cube, Inputs
+from chunked import ChunkedLevel
+from prefetch import build_level
+
+NO_INPUT = Inputs(False, False, False, False)
+
+SPAWN = (100, 0)
+
+
+def load_collision(level_number):
+    """Return the CollisionMap for a level without needing a display.
+
+    Uses the compiled level file when it is fresh, otherwise builds the level
+    as the game does; a level wider than the screen is assembled into one
+    map covering its full width, so BatchSimulation can run on it too.
+    """
+    compiled = levelfile.load(level_number)
+    if compiled is not None:
+        return compiled.collision
+    level = build_level(level_number)
+    if isinstance(level, ChunkedLevel):
+        return level.collision_map()
+    return level.collision
+
+
+def cube_state(cube):
+    """Everything about a cube that the next tick depends on."""
+    return (cube.x, cube.y, cube.velocity_x, cube.velocity_y,
+            cube.jumping, cube.wall_sliding, cube.jump_key_held)
+
+
+class Simulation:
+    """Steps one headless Cube from input vectors at a fixed dt."""
+
+    def __init__(self, collision, dt=1 / PHYSICS_TICK_RATE, start=SPAWN, size=50):
+        self.collision = collision
+        self.dt = dt
+        self.cube = Cube(start[0], start[1], size, headless=True)
+        self.ticks = 0
+
+    def step(self, inputs=NO_INPUT):
+        """Advance one tick; returns True when the cube reaches the goal."""
+        self.cube.apply_input(*inputs, level=self.collision)
+        self.ticks += 1
+        return bool(self.cube.update(self.dt, self.collision))
+
+    def run(self, inputs):
+        """Step through an iterable of Inputs; returns the tick the goal was
+        reached on, or None if the inputs ran out first."""
+        for tick_inputs in inputs:
+            if self.step(tick_inputs):
+                return self.ticks
+        return None
+
+    def state(self):
+        return cube_state(self.cube)
+
+
+if __name__ == "__main__":
+    level_number = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+    steps = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+
+    sim = Simulation(load_collision(level_number))
+    hold_right = Inputs(False, True, False, False)
+    start = time.perf_counter()
+    goal_tick = sim.run(hold_right for _ in range(steps))
+    elapsed = time.perf_counter() - start
+    print(f"{sim.ticks} steps in {elapsed:.3f}s ({sim.ticks / elapsed:.0f} steps/s), "
+          f"goal tick {goal_tick}, deaths {sim.cube.deaths}, state {sim.state()}")
@@ -1,34 +1,165 @@
-#play music loop for /assets/Music/music.mp3
+# the game's one audio engine: low-latency mixer, reserved voice pool with
+# priority stealing, per-sound rate limits, and music playback
+import time
+from collections import namedtuple
 import pygame
+from assets import registry
+from constants import AUDIO_FREQUENCY, AUDIO_BUFFER, AUDIO_VOICES
+
+# How a named effect plays: a higher `priority` may steal voices from lower
+# ones, triggers closer together than `min_interval` seconds are dropped and
+# at most `max_voices` copies sound at once (a new one restarts the oldest).
+SoundSpec = namedtuple("SoundSpec", "sound priority min_interval max_voices")
+
+# Effects decoded when the engine starts.
+EFFECTS = {
+    "death": ("assets/Music/death.wav", 10, 0.08, 2),
+}
+
+
+def pre_init_mixer(buffer=AUDIO_BUFFER):
+    """Request the low-latency mixer format; call before pygame.init()."""
+    pygame.mixer.pre_init(AUDIO_FREQUENCY, -16, 2, buffer)
+
 
 class SoundManager:
     """Manages sound effects and music playback for the game.
+
+    Every mixer channel is reserved and handed out here, so Sound.play()'s
+    own channel choice never runs: a trigger takes an idle voice, or steals
+    the lowest-priority one (oldest first among equals), or is dropped when
+    every voice is busy with something more important. `init()` opens the
+    mixer with a buffer of `buffer` samples and decodes EFFECTS; the first
+    play_sound() calls it if nobody has.
     """
-    def __init__(self):
-        pygame.mixer.init()
-        self.sounds = {}
+
+    def __init__(self, buffer=AUDIO_BUFFER, voices=AUDIO_VOICES):
+        self.buffer = buffer
+        self.voices = voices
+        self.initialized = False
+        self.sounds = {}  # name -> SoundSpec
         self.music_volume = 0.5
         self.effects_volume = 0.5
-        self.load_sound("death", "assets/Music/death.wav")
+        self.stats = {"played": 0, "stolen": 0, "limited": 0, "dropped": 0}
+        self._channels = []
+        self._playing = []  # per channel: (name, priority, started) or None
+        self._last_trigger = {}
+
+    def init(self):
+        """Open the mixer (unless pygame.init() already did) and decode the effects."""
+        if self.initialized:
+            return
+        self.initialized = True
+        try:
+            if not pygame.mixer.get_init():
+                pygame.mixer.init(AUDIO_FREQUENCY, -16, 2, self.buffer)
+            pygame.mixer.set_num_channels(self.voices)
+            pygame.mixer.set_reserved(self.voices)
+        except pygame.error as e:
+            # No audio device: keep running silently.
+            print(f"Error initialising audio: {e}")
+            return
+        self._channels = [pygame.mixer.Channel(i) for i in range(self.voices)]
+        self._playing = [None] * self.voices
+        for name, (path, priority, min_interval, max_voices) in EFFECTS.items():
+            self.load_sound(name, path, priority, min_interval, max_voices)
 
-    def load_sound(self, name: str, path: str):
-        """Load a sound effect from the given file path."""
+    def load_sound(self, name: str, path: str, priority=0, min_interval=0.05, max_voices=4):
+        """Decode a sound effect now and register how it may be played."""
         try:
-            sound = pygame.mixer.Sound(path)
-            sound.set_volume(self.effects_volume)
-            self.sounds[name] = sound
+            # Decoded sounds are shared through the registry (see preload.py).
+            self.sounds[name] = SoundSpec(registry.sound(path), priority, min_interval, max_voices)
         except Exception as e:
             print(f"Error loading sound '{name}' from '{path}': {e}")
 
     def play_sound(self, name: str):
-        """Play a loaded sound effect by name."""
-        if name in self.sounds:
-            self.sounds[name].play()
-        else:
+        """Trigger a loaded effect; returns its Channel, or None if it was
+        rate limited or no voice could be had."""
+        self.init()
+        spec = self.sounds.get(name)
+        if spec is None:
             print(f"Sound '{name}' not found!")
+            return None
+
+        now = time.perf_counter()
+        last = self._last_trigger.get(name)
+        if last is not None and now - last < spec.min_interval:
+            self.stats["limited"] += 1
+            return None
+        index = self._voice_for(name, spec)
+        if index is None:
+            self.stats["dropped"] += 1
+            return None
+
+        self._last_trigger[name] = now
+        channel = self._channels[index]
+        channel.set_volume(self.effects_volume)
+        channel.play(spec.sound)
+        self._playing[index] = (name, spec.priority, now)
+        self.stats["played"] += 1
+        return channel
+
+    def _voice_for(self, name, spec):
+        idle = None
+        same = []
+        busy = []
+        for index, channel in enumerate(self._channels):
+            voice = self._playing[index]
+            if voice is None or not channel.get_busy():
+                self._playing[index] = None
+                if idle is None:
+                    idle = index
+                continue
+            busy.append(index)
+            if voice[0] == name:
+                same.append(index)
+
+        oldest = lambda index: self._playing[index][2]
+        if len(same) >= spec.max_voices:
+            self.stats["stolen"] += 1
+            return min(same, key=oldest)
+        if idle is not None:
+            return idle
+        victims = [index for index in busy if self._playing[index][1] <= spec.priority]
+        if not victims:
+            return None
+        self.stats["stolen"] += 1
+        return min(victims, key=lambda index: (self._playing[index][1], oldest(index)))
+
+    def measure_latency(self, trials=5):
+        """Return ``(trigger_to_mix, trigger_to_output)`` in seconds, median of `trials`.
+
+        A 5 ms silent click is played on a free voice and its channel polled
+        until the mixer has consumed it; the time beyond the click's length
+        is the wait for the mixer to start it. The device then holds about
+        one more buffer before it is heard.
+        """
+        self.init()
+        init = pygame.mixer.get_init()
+        if not init or not self._channels:
+            return None
+        frequency, fmt, channels = init
+        frames = frequency // 200
+        click = pygame.mixer.Sound(buffer=bytes(frames * channels * (abs(fmt) // 8)))
+        length = frames / frequency
+        channel = self._channels[-1]
+
+        waits = []
+        for _ in range(trials):
+            channel.stop()
+            start = time.perf_counter()
+            channel.play(click)
+            while channel.get_busy() and time.perf_counter() - start < 1.0:
+                time.sleep(0.0002)
+            waits.append(max(0.0, time.perf_counter() - start - length))
+        self._playing[-1] = None
+        waits.sort()
+        to_mix = waits[len(waits) // 2]
+        return to_mix, to_mix + self.buffer / frequency
 
     def play_music(self, path: str, loop: bool = True):
         """Play background music from the given file path."""
+        self.init()
         try:
             pygame.mixer.music.load(path)
             pygame.mixer.music.set_volume(self.music_volume)
@@ -38,18 +169,42 @@ class SoundManager:
 
     def stop_music(self):
         """Stop the currently playing music."""
-        pygame.mixer.music.stop()
+        if pygame.mixer.get_init():
+            pygame.mixer.music.stop()
 
     def set_music_volume(self, volume: float):
         """Set the music volume (0.0 to 1.0)."""
         self.music_volume = max(0.0, min(1.0, volume))
-        pygame.mixer.music.set_volume(self.music_volume)
+        if pygame.mixer.get_init():
+            pygame.mixer.music.set_volume(self.music_volume)
 
     def set_effects_volume(self, volume: float):
-        """Set the sound effects volume (0.0 to 1.0)."""
+        """Set the sound effects volume (0.0 to 1.0) for this and later triggers."""
         self.effects_volume = max(0.0, min(1.0, volume))
-        for sound in self.sounds.values():
-            sound.set_volume(self.effects_volume)
+        for index, channel in enumerate(self._channels):
+            if self._playing[index] is not None:
+                channel.set_volume(self.effects_volume)
 
     def death_sound(self):
-        self.play_sound("death")
\ No newline at end of file
+        self.play_sound("death")
+
+
+# The engine everything plays through. Creating it touches no audio device;
+# the mixer opens on init() or the first sound played.
+audio = SoundManager()
+
+
+if __name__ == "__main__":
+    # python sound.py [buffer sizes...]: trigger-to-output latency per buffer size
+    import sys
+    for buffer in [int(arg) for arg in sys.argv[1:]] or [AUDIO_BUFFER]:
+        pygame.mixer.quit()
+        engine = SoundManager(buffer=buffer)
+        pre_init_mixer(buffer)
+        latency = engine.measure_latency()
+        if latency is None:
+            print("no audio device")
+            break
+        to_mix, to_output = latency
+        print(f"buffer {buffer:5} samples: mixed after {to_mix * 1000:5.1f} ms, "
+              f"heard after ~{to_output * 1000:5.1f} ms")
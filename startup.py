@@ -0,0 +1,118 @@
+# startup trace: time from launch to the first menu frame, split into steps
+#   python startup.py [--full] [--budget SECONDS]
+# runs the game under -X importtime until its menu is shown, then reports
+# each init step, the slowest imports and the total against the budget.
+import time
+
+_START = time.perf_counter()
+
+
+class StartupTrace:
+    """Sequential checkpoints from importing this module to the first menu frame.
+
+    `mark(name)` closes a step that began at the previous mark, so a
+    linear startup script only needs one call after each stage.
+    """
+
+    def __init__(self, start=_START):
+        self.start = start
+        self.marks = []  # (name, seconds since start)
+        self.to_menu = None
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.start))
+
+    def menu_shown(self):
+        if self.to_menu is None:
+            self.mark("first menu frame")
+            self.to_menu = self.marks[-1][1]
+
+    def steps(self):
+        """Return ``[(name, seconds), ...]`` spent in each step."""
+        steps = []
+        previous = 0.0
+        for name, at in self.marks:
+            steps.append((name, at - previous))
+            previous = at
+        return steps
+
+    def save(self, path):
+        import json
+        with open(path, "w") as f:
+            json.dump({"steps": self.steps(), "to_menu": self.to_menu}, f, indent=1)
+
+
+startup = StartupTrace()
+
+
+def parse_importtime(stderr):
+    """Return ``[(module, self s, cumulative s, depth), ...]`` from -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            continue  # the column header
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        modules.append((name.strip(), self_us / 1e6, cumulative_us / 1e6, depth))
+    return modules
+
+
+def measure(full=False):
+    """Run the game up to its menu; return ``(trace dict, imports, wall seconds)``."""
+    import json
+    import os
+    import subprocess
+    import sys
+    import tempfile
+
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    command = [sys.executable, "-X", "importtime", "index.py", "--quit-at-menu", "--startup-trace", path]
+    if not full:
+        command.append("--fast-start")
+    try:
+        started = time.perf_counter()
+        result = subprocess.run(command, capture_output=True, text=True)
+        wall = time.perf_counter() - started
+        if result.returncode != 0:
+            raise RuntimeError(f"game exited with {result.returncode}:\n{result.stderr[-2000:]}")
+        with open(path) as f:
+            trace = json.load(f)
+    finally:
+        os.remove(path)
+    return trace, parse_importtime(result.stderr), wall
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from constants import STARTUP_BUDGET
+
+    parser = argparse.ArgumentParser(description="Report time to the first menu frame")
+    parser.add_argument("--full", action="store_true", help="measure the normal start instead of --fast-start")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET, help="seconds (default %(default)s)")
+    parser.add_argument("--top", type=int, default=12, help="imports to list (default %(default)s)")
+    args = parser.parse_args()
+
+    trace, imports, wall = measure(args.full)
+    print(f"{'full' if args.full else 'fast'} start: menu after {trace['to_menu'] * 1000:.0f} ms "
+          f"(budget {args.budget * 1000:.0f} ms), process ran {wall * 1000:.0f} ms")
+    for name, seconds in trace["steps"]:
+        print(f"  {name:<24} {seconds * 1000:8.1f} ms")
+
+    print("imported by the game, cumulative:")
+    game = [m for m in imports if m[3] == 0]
+    for name, _, cumulative, _ in sorted(game, key=lambda m: m[2], reverse=True)[:args.top]:
+        print(f"  {name:<24} {cumulative * 1000:8.1f} ms")
+    print("slowest modules, self time:")
+    for name, own, _, _ in sorted(imports, key=lambda m: m[1], reverse=True)[:args.top]:
+        print(f"  {name:<24} {own * 1000:8.1f} ms")
+
+    if trace["to_menu"] > args.budget:
+        print(f"over budget by {(trace['to_menu'] - args.budget) * 1000:.0f} ms")
+        sys.exit(1)
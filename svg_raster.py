@@ -0,0 +1,120 @@
+# cairosvg rasterisation backend, imported lazily by utils.svg_to_surface
+import sys
+import numpy as np
+from cairosvg.parser import Tree
+from cairosvg.surface import PNGSurface, cairo
+from PIL import Image
+from utils import intrinsic_size
+
+# cairo ARGB32 pixels are premultiplied and stored in native byte order, so
+# on little-endian machines the bytes read B, G, R, A. PIL's "BGRa" raw mode
+# un-premultiplies while unpacking, giving straight RGBA in one pass. PIL has
+# no un-premultiplying mode for the big-endian A, R, G, B order, so that is
+# done with NumPy instead (see _unpremultiply_argb).
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+class _RasterSurface(PNGSurface):
+    """cairosvg surface that renders into an in-memory cairo ImageSurface.
+
+    `canvas_size` lets the pixel buffer be smaller than the rendered
+    document (e.g. the visible box in 'cover' mode); `origin` is the
+    top-left corner of that box in output pixels.
+    """
+
+    def __init__(self, tree, output_width, output_height, canvas_size=None, origin=(0, 0)):
+        self._canvas_size = canvas_size
+        self._origin = origin
+        super().__init__(tree, None, 96, output_width=output_width, output_height=output_height)
+
+    def _create_surface(self, width, height):
+        if self._canvas_size is None:
+            return super()._create_surface(width, height)
+        canvas_w, canvas_h = self._canvas_size
+        canvas = cairo.ImageSurface(cairo.FORMAT_ARGB32, canvas_w, canvas_h)
+        return canvas, int(round(width)), int(round(height))
+
+    def set_context_size(self, width, height, viewbox, tree):
+        ox, oy = self._origin
+        if ox or oy:
+            self.context.translate(-ox, -oy)
+        super().set_context_size(width, height, viewbox, tree)
+
+
+def _output_size(intrinsic, width, height, scale_mode):
+    """Return the rasterised document size for the requested box."""
+    if not intrinsic:
+        return width, height
+
+    iw, ih = intrinsic
+    if width and height:
+        if scale_mode == 'contain':
+            # scale to fit inside box
+            scale = min(width / iw, height / ih)
+        elif scale_mode == 'cover':
+            # scale to cover the box (may overflow), the overflow is cropped
+            scale = max(width / iw, height / ih)
+        else:
+            # 'fill' or unknown: stretch to exact dimensions
+            return width, height
+    elif width:
+        scale = width / iw
+    elif height:
+        scale = height / ih
+    else:
+        return None, None
+    return int(round(iw * scale)), int(round(ih * scale))
+
+
+def rasterize_svg(svg_path, width=None, height=None, scale_mode='contain'):
+    """Rasterise an SVG file and return ``(rgba_bytes, (w, h))``.
+
+    The document is parsed once, drawn straight into a cairo ImageSurface
+    and converted from premultiplied BGRA to straight RGBA in a single pass.
+    """
+    tree = Tree(url=svg_path)
+    out_w, out_h = _output_size(intrinsic_size(tree), width, height, scale_mode)
+
+    canvas_size = None
+    origin = (0, 0)
+    if width and height and scale_mode == 'cover' and out_w and out_h:
+        # Only allocate the visible box: centre horizontally, bottom-align vertically.
+        canvas_size = (min(out_w, width), min(out_h, height))
+        origin = (max(0, (out_w - width) // 2), max(0, out_h - height))
+
+    return _to_rgba(_RasterSurface(tree, out_w, out_h, canvas_size, origin))
+
+
+def rasterize_region(svg_path, output_size, region):
+    """Rasterise only `region` (x, y, w, h) of an SVG drawn at `output_size`.
+
+    Used to render large levels chunk by chunk: the canvas is just the
+    region, so memory stays proportional to the chunk, not the document.
+    """
+    x, y, w, h = region
+    tree = Tree(url=svg_path)
+    return _to_rgba(_RasterSurface(tree, output_size[0], output_size[1], (w, h), (x, y)))
+
+
+def _unpremultiply_argb(data, size, stride):
+    """Straight RGBA bytes from premultiplied A, R, G, B rows `stride` bytes
+    apart, truncated the same way as PIL's "BGRa" unpacker."""
+    w, h = size
+    argb = np.frombuffer(data, np.uint8).reshape(h, stride)[:, :w * 4].reshape(h, w, 4)
+    alpha = argb[..., :1].astype(np.uint32)
+    rgb = np.minimum(argb[..., 1:].astype(np.uint32) * 255 // np.maximum(alpha, 1), 255)
+    rgba = np.empty((h, w, 4), np.uint8)
+    rgba[..., :3] = np.where(alpha > 0, rgb, 0)
+    rgba[..., 3] = argb[..., 0]
+    return rgba.tobytes()
+
+
+def _to_rgba(raster):
+    cairo_surface = raster.cairo
+    cairo_surface.flush()
+    size = (cairo_surface.get_width(), cairo_surface.get_height())
+    if not _LITTLE_ENDIAN:
+        return _unpremultiply_argb(cairo_surface.get_data(), size, cairo_surface.get_stride()), size
+    img = Image.frombuffer("RGBA", size, cairo_surface.get_data(), "raw",
+                           "BGRa", cairo_surface.get_stride(), 1)
+    return img.tobytes(), size
@@ -0,0 +1,37 @@
+# synthetic collision maps for the tests, built from arrays (no SVGs or cairo)
+import numpy as np
+from collision import CollisionMap
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+
+FLOOR_Y = 1000
+
+
+def build(solid=None, hazard=None, goal=None, width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+    """CollisionMap from `{(x0, y0, x1, y1), ...}` boxes per layer."""
+    def layer(boxes):
+        if boxes is None:
+            return None
+        plane = np.zeros((height, width), dtype=bool)
+        for x0, y0, x1, y1 in boxes:
+            plane[y0:y1, x0:x1] = True
+        return plane
+    return CollisionMap.from_layers(width, height, solid=layer(solid), hazard=layer(hazard), goal=layer(goal))
+
+
+def flat(**layers):
+    """A floor at FLOOR_Y across the whole width, plus any other layers."""
+    return build(solid=[(0, FLOOR_Y, SCREEN_WIDTH, SCREEN_HEIGHT)], **layers)
+
+
+def course():
+    """Floor, a wall to jump, a raised ledge, a spike strip and a goal at the far right."""
+    return build(
+        solid=[
+            (0, FLOOR_Y, SCREEN_WIDTH, SCREEN_HEIGHT),
+            (600, 900, 640, FLOOR_Y),  # wall
+            (900, 820, 1100, 840),  # ledge
+            (1500, 700, 1520, FLOOR_Y),  # tall wall for wall slides
+        ],
+        hazard=[(1200, 990, 1300, FLOOR_Y)],
+        goal=[(SCREEN_WIDTH - 40, 0, SCREEN_WIDTH, SCREEN_HEIGHT)],
+    )
@@ -0,0 +1,96 @@
+# BatchSimulation against one Simulation per cube, tick for tick
+import numpy as np
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from batch import BatchSimulation
+from cube import Inputs
+from sim import Simulation
+import maps
+
+CUBES = 32
+TICKS = 3000
+
+PARAMS = {
+    "speed": (300, 500),
+    "jump_speed": (-1100, -700),
+    "gravity": (2500, 3500),
+    "wall_slide_gravity_scale": (0.3, 0.7),
+    "wall_slide_max_fall": (30, 60),
+    "wall_jump_h_mult": (1.2, 2.0),
+}
+
+
+def two_tier_course():
+    """An upper course above GROUND_Y (where wall slides happen) over a lower
+    floor with a pit, spikes on both and the goal at the far right."""
+    return maps.build(
+        solid=[
+            (0, 450, 1350, 470),  # upper floor, with a drop to the lower one
+            (1420, 450, SCREEN_WIDTH, 470),
+            (600, 350, 640, 450),  # wall to jump
+            (1500, 250, 1520, 450),  # tall wall for wall slides and wall jumps
+            (0, maps.FLOOR_Y, 900, SCREEN_HEIGHT),  # lower floor, with a pit
+            (980, maps.FLOOR_Y, SCREEN_WIDTH, SCREEN_HEIGHT),
+        ],
+        hazard=[(1200, 440, 1300, 450), (300, 990, 400, maps.FLOOR_Y)],
+        goal=[(SCREEN_WIDTH - 40, 0, SCREEN_WIDTH, SCREEN_HEIGHT)],
+    )
+
+
+def mixed_inputs(rng):
+    """(TICKS, CUBES, 4) bools: each cube holds random key combinations for
+    random stretches, mostly heading right and jumping often."""
+    inputs = np.zeros((TICKS, CUBES, 4), dtype=bool)
+    odds = np.array([0.25, 0.6, 0.35, 0.05])  # left, right, jump, down
+    for cube in range(CUBES):
+        tick = 0
+        while tick < TICKS:
+            length = int(rng.integers(5, 60))
+            inputs[tick:tick + length, cube] = rng.random(4) < odds
+            tick += length
+    return inputs
+
+
+def test_batch_matches_one_simulation_per_cube():
+    rng = np.random.default_rng(12)
+    collision = two_tier_course()
+    params = {name: rng.uniform(lo, hi, CUBES) for name, (lo, hi) in PARAMS.items()}
+    inputs = mixed_inputs(rng)
+
+    batch = BatchSimulation(collision, CUBES, **params)
+    sims = []
+    for i in range(CUBES):
+        sim = Simulation(collision)
+        for name, values in params.items():
+            setattr(sim.cube, name, float(values[i]))
+        sims.append(sim)
+
+    # (x, y, velocity_x, velocity_y) of every cube after every tick.
+    expected = np.zeros((TICKS, CUBES, 4))
+    actual = np.zeros((TICKS, CUBES, 4))
+    goal_ticks = np.full(CUBES, -1)
+    wall_slides = 0
+    for tick in range(TICKS):
+        left, right, jump, down = inputs[tick].T
+        batch.step(left, right, jump, down)
+        actual[tick] = np.column_stack((batch.x, batch.y, batch.velocity_x, batch.velocity_y))
+        wall_slides += int(batch.wall_sliding.sum())
+        for i, sim in enumerate(sims):
+            # BatchSimulation freezes a cube on the goal; stop its twin there too.
+            if goal_ticks[i] < 0 and sim.step(Inputs(*inputs[tick, i].tolist())):
+                goal_ticks[i] = sim.ticks
+            cube = sim.cube
+            expected[tick, i] = cube.x, cube.y, cube.velocity_x, cube.velocity_y
+
+    error = np.abs(actual - expected).max(axis=(1, 2))
+    first = int(np.argmax(error > 1e-6))
+    assert error.max() <= 1e-6, f"diverged at tick {first}: {actual[first]} != {expected[first]}"
+    assert batch.deaths.tolist() == [sim.cube.deaths for sim in sims]
+    assert batch.goal_tick.tolist() == goal_ticks.tolist()
+    assert batch.jumping.tolist() == [sim.cube.jumping for sim in sims]
+    assert batch.wall_sliding.tolist() == [sim.cube.wall_sliding for sim in sims]
+    # The run only proves something if it covers deaths, wall slides and
+    # finishes, and leaves some cubes still going.
+    assert batch.deaths.any()
+    assert wall_slides
+    assert (batch.goal_tick >= 0).any()
+    assert (batch.goal_tick < 0).any()
@@ -0,0 +1,91 @@
+# scrolling levels: the streamed chunk window against one whole-level CollisionMap
+import numpy as np
+import pygame
+import pytest
+import chunked
+import sim
+from batch import BatchSimulation
+from chunked import ChunkedLevel, Chunk, SWEEP_RANGE
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from cube import Inputs
+import maps
+
+WIDTH = 4000
+
+
+def wide_map():
+    """A level over twice the screen width: floor with gaps, platforms and spikes."""
+    rng = np.random.default_rng(5)
+    solid = [(x, maps.FLOOR_Y, x + 700, SCREEN_HEIGHT) for x in range(0, WIDTH, 800)]
+    solid += [(int(x), int(y), int(x) + int(rng.integers(40, 300)), int(y) + 20)
+              for x, y in zip(rng.integers(0, WIDTH, 40), rng.integers(100, maps.FLOOR_Y - 20, 40))]
+    hazard = [(x + 300, maps.FLOOR_Y - 10, x + 360, maps.FLOOR_Y) for x in range(800, WIDTH, 1600)]
+    return maps.build(solid=solid, hazard=hazard, goal=[(WIDTH - 40, 0, WIDTH, SCREEN_HEIGHT)],
+                      width=WIDTH, height=SCREEN_HEIGHT)
+
+
+@pytest.fixture
+def level(monkeypatch):
+    """A ChunkedLevel whose chunks are cut from wide_map() instead of rasterised SVGs."""
+    full = wide_map()
+    monkeypatch.setattr(chunked, "world_size", lambda path: (WIDTH, SCREEN_HEIGHT))
+
+    def build(self, cx, cy, layers=None):
+        size = self.chunk_size
+        rect = pygame.Rect(cx * size, cy * size, size, size).clip(self.bounds)
+        return Chunk(rect, None, full.tiles[rect.top:rect.bottom, rect.left:rect.right].copy())
+    monkeypatch.setattr(ChunkedLevel, "_build", build)
+    level = ChunkedLevel("wide.svg", 0)
+    level.full = full
+    return level
+
+
+def random_rects(count, seed=1):
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, 80, (count, 2))
+    corners = rng.integers(-100, [WIDTH + 20, SCREEN_HEIGHT + 20], (count, 2))
+    return [pygame.Rect(int(x), int(y), int(w), int(h)) for (x, y), (w, h) in zip(corners, sizes)]
+
+
+def test_query_matches_the_whole_map(level):
+    for rect in random_rects(2000):
+        assert level.query(rect) == level.full.query(rect), rect
+
+
+@pytest.mark.parametrize("axis, direction", [("x", 1), ("x", -1), ("y", 1), ("y", -1)])
+def test_sweep_matches_the_whole_map_within_range(level, axis, direction):
+    for rect in random_rects(2000, seed=2):
+        want = level.full.sweep(rect, axis, direction)
+        got = level.sweep(rect, axis, direction)
+        if want < SWEEP_RANGE:
+            assert got == want, rect
+        else:
+            # Further than the scan reaches: a lower bound of at least SWEEP_RANGE.
+            assert SWEEP_RANGE <= got <= want, rect
+
+
+def test_load_collision_assembles_the_whole_level(level, monkeypatch):
+    monkeypatch.setattr(sim.levelfile, "load", lambda level_number: None)
+    monkeypatch.setattr(sim, "build_level", lambda level_number: level)
+    collision = sim.load_collision(0)
+    assert (collision.width, collision.height) == (WIDTH, SCREEN_HEIGHT)
+    assert np.array_equal(collision.tiles, level.full.tiles)
+
+
+def test_batch_runs_a_wide_level_like_the_streamed_one(level):
+    jump_every = [60, 75, 90, 120]
+    batch = BatchSimulation(level.collision_map(), len(jump_every))
+    sims = [sim.Simulation(level) for _ in jump_every]
+    finished = [False] * len(sims)
+    for tick in range(2400):
+        jumps = [tick % every < 10 for every in jump_every]
+        batch.step(right=True, jump=jumps)
+        for i, (single, jump) in enumerate(zip(sims, jumps)):
+            # BatchSimulation freezes a cube on the goal; stop its twin there too.
+            if not finished[i]:
+                finished[i] = single.step(Inputs(False, True, jump, False))
+    assert np.allclose(batch.x, [single.cube.x for single in sims], rtol=0, atol=1e-6)
+    assert np.allclose(batch.y, [single.cube.y for single in sims], rtol=0, atol=1e-6)
+    assert batch.deaths.tolist() == [single.cube.deaths for single in sims]
+    # Cubes got well past the screen width, where a screen-sized clamp stops them.
+    assert batch.x.max() > 2 * SCREEN_WIDTH
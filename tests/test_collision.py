@@ -0,0 +1,142 @@
+# DistanceIndex and CollisionMap against brute-force pixel checks on synthetic maps
+import numpy as np
+import pygame
+import pytest
+from collision import CollisionMap, DistanceIndex, UNBOUNDED, SOLID, HAZARD, GOAL
+
+WIDTH, HEIGHT = 96, 64
+
+
+@pytest.fixture(scope="module")
+def solid():
+    rng = np.random.default_rng(5)
+    solid = np.zeros((HEIGHT, WIDTH), dtype=bool)
+    for _ in range(40):
+        x, y = rng.integers(0, WIDTH), rng.integers(0, HEIGHT)
+        w, h = rng.integers(1, 12), rng.integers(1, 6)
+        solid[y:y + h, x:x + w] = True
+    solid[-4:, :] = True  # floor
+    solid[:, 40:42] = False  # a gap right through the map
+    return solid
+
+
+def overlaps(solid, rect):
+    x0, x1 = max(rect.left, 0), min(rect.right, WIDTH)
+    y0, y1 = max(rect.top, 0), min(rect.bottom, HEIGHT)
+    return x0 < x1 and y0 < y1 and bool(solid[y0:y1, x0:x1].any())
+
+
+def walk(solid, rect, axis, direction):
+    """Step one pixel at a time until the box would overlap solid."""
+    step = (direction, 0) if axis == "x" else (0, direction)
+    moved = rect.copy()
+    for distance in range(WIDTH + HEIGHT + rect.width + rect.height):
+        moved.move_ip(step)
+        if overlaps(solid, moved):
+            return distance
+    return UNBOUNDED
+
+
+def climb(solid, rect, max_distance):
+    for up in range(max_distance + 1):
+        if not overlaps(solid, rect.move(0, -up)):
+            return rect.y - up
+    return None
+
+
+def free_rects(solid, count, seed):
+    """Random boxes clear of solid, many of them partly off the map."""
+    rng = np.random.default_rng(seed)
+    rects = []
+    while len(rects) < count:
+        w, h = rng.integers(1, 20, size=2)
+        x = rng.integers(-w - 4, WIDTH + 4)
+        y = rng.integers(-h - 4, HEIGHT + 4)
+        rect = pygame.Rect(int(x), int(y), int(w), int(h))
+        if not overlaps(solid, rect):
+            rects.append(rect)
+    return rects
+
+
+@pytest.mark.parametrize("axis,direction,seed", [("x", 1, 1), ("x", -1, 2), ("y", 1, 3), ("y", -1, 4)])
+def test_sweep_matches_pixel_walk(solid, axis, direction, seed):
+    index = DistanceIndex(solid)
+    rects = free_rects(solid, 500, seed)
+    off_map = [r for r in rects if not pygame.Rect(0, 0, WIDTH, HEIGHT).contains(r)]
+    assert len(off_map) > 50
+    for rect in rects:
+        assert index.sweep(rect, axis, direction) == walk(solid, rect, axis, direction), rect
+
+
+def test_sweep_off_the_map_is_unbounded(solid):
+    index = DistanceIndex(solid)
+    assert index.sweep(pygame.Rect(WIDTH + 5, 10, 8, 8), "x", 1) == UNBOUNDED
+    assert index.sweep(pygame.Rect(-20, 10, 8, 8), "x", -1) == UNBOUNDED
+    assert index.sweep(pygame.Rect(10, -30, 8, 8), "x", 1) == UNBOUNDED
+
+
+def test_lift_matches_climb(solid):
+    index = DistanceIndex(solid)
+    rng = np.random.default_rng(11)
+    for _ in range(500):
+        w, h = (int(v) for v in rng.integers(1, 20, size=2))
+        rect = pygame.Rect(int(rng.integers(-w, WIDTH)), int(rng.integers(-h, HEIGHT + 4)), w, h)
+        max_distance = int(rng.integers(0, 30))
+        assert index.lift(rect, max_distance) == climb(solid, rect, max_distance), (rect, max_distance)
+
+
+def or_of_tiles(tiles, rect):
+    x0, x1 = max(rect.left, 0), min(rect.right, WIDTH)
+    y0, y1 = max(rect.top, 0), min(rect.bottom, HEIGHT)
+    if x0 >= x1 or y0 >= y1:
+        return 0
+    return int(np.bitwise_or.reduce(tiles[y0:y1, x0:x1], axis=None))
+
+
+def random_rects(count, seed):
+    rng = np.random.default_rng(seed)
+    rects = []
+    for _ in range(count):
+        w, h = (int(v) for v in rng.integers(0, 24, size=2))
+        rects.append(pygame.Rect(int(rng.integers(-w - 4, WIDTH + 4)), int(rng.integers(-h - 4, HEIGHT + 4)), w, h))
+    return rects
+
+
+def test_query_matches_the_tiles_under_the_box(solid):
+    hazard = np.zeros_like(solid)
+    hazard[HEIGHT - 6:HEIGHT - 4, 10:30] = True
+    goal = np.zeros_like(solid)
+    goal[:, -3:] = True
+    collision = CollisionMap.from_layers(WIDTH, HEIGHT, solid=solid, hazard=hazard, goal=goal)
+    for rect in random_rects(1000, seed=6):
+        flags = or_of_tiles(collision.tiles, rect)
+        assert collision.query(rect) == flags, rect
+        assert collision.get_collisions(rect) == bool(flags & SOLID), rect
+        assert collision.touching_spikes(rect) == bool(flags & HAZARD), rect
+        assert collision.touching_goal(rect) == bool(flags & GOAL), rect
+
+
+def test_query_follows_replaced_layers(solid):
+    collision = CollisionMap.from_layers(WIDTH, HEIGHT, solid=solid)
+    box = pygame.Rect(10, 10, 4, 4)
+    assert not collision.touching_spikes(box)
+    hazard = np.zeros_like(solid)
+    hazard[12, 12] = True
+    collision.set_layer(HAZARD, hazard)
+    assert collision.touching_spikes(box)
+    collision.set_layer(HAZARD, None)
+    assert not collision.touching_spikes(box)
+
+
+def test_sense_matches_the_sweeps_and_box_queries(solid):
+    hazard = np.zeros_like(solid)
+    hazard[HEIGHT - 6:HEIGHT - 4, 10:30] = True
+    collision = CollisionMap.from_layers(WIDTH, HEIGHT, solid=solid, hazard=hazard)
+    for rect in random_rects(1000, seed=7):
+        contacts = collision.sense(rect)
+        assert contacts.left == (collision.sweep(rect, "x", -1) == 0), rect
+        assert contacts.right == (collision.sweep(rect, "x", 1) == 0), rect
+        assert contacts.ground == (collision.sweep(rect, "y", 1) == 0), rect
+        assert contacts.ceiling == (collision.sweep(rect, "y", -1) == 0), rect
+        assert contacts.hazard == collision.touching_spikes(rect), rect
+        assert contacts.goal == collision.touching_goal(rect), rect
@@ -0,0 +1,32 @@
+# glyph atlas text against the font's own renderer
+import numpy as np
+import pygame
+import pytest
+import glyphs
+from assets import registry
+
+WHITE = (255, 255, 255)
+
+
+@pytest.fixture(scope="module")
+def font():
+    pygame.font.init()
+    # The menu's face; without Arial installed SysFont falls back to pygame's default.
+    return registry.font("Arial", 40)
+
+
+@pytest.mark.parametrize("text", ["Level 1", "Level 6", "AVAWAY To", "Hello World", "1234567890"])
+def test_font_atlas_draws_like_font_render(font, text):
+    expected = font.render(text, True, WHITE)
+    atlas = glyphs.sysfont("Arial", 40, WHITE)
+    assert atlas.size(text) == expected.get_size()
+
+    drawn = pygame.Surface(expected.get_size(), pygame.SRCALPHA)
+    atlas.draw(drawn, text)
+    assert np.array_equal(pygame.surfarray.array_alpha(drawn), pygame.surfarray.array_alpha(expected))
+
+
+def test_small_digits_keep_whole_pixel_advances():
+    digits = glyphs.small_digits(scale=4)
+    # Each digit advances 3 columns of 4 px plus a 5 px gap.
+    assert digits.size("88") == (2 * 17, 20)
@@ -0,0 +1,58 @@
+# compiled .lvl files: what write() stores is what load() maps back
+import os
+import numpy as np
+import pygame
+import pytest
+import levelfile
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+import maps
+
+
+def test_tiles_and_distances_round_trip(tmp_path):
+    collision = maps.course()
+    rgba = np.random.default_rng(3).integers(0, 256, SCREEN_WIDTH * SCREEN_HEIGHT * 4, dtype=np.uint8).tobytes()
+    path = str(tmp_path / "Level1.lvl")
+    levelfile.write(path, SCREEN_WIDTH, SCREEN_HEIGHT, {levelfile.LEVEL: rgba, levelfile.SPIKES: None}, collision)
+
+    compiled = levelfile.CompiledLevel(path)
+    assert np.array_equal(compiled.collision.tiles, collision.tiles)
+    loaded, built = compiled.collision.distance_index, collision.distance_index
+    for name in ("next_x", "prev_x", "next_y", "prev_y"):
+        assert np.array_equal(getattr(loaded, name), getattr(built, name)), name
+    assert pygame.image.tobytes(compiled.image, "RGBA") == rgba
+    assert compiled.spikes_image is None
+    # The distance tables are stored compressed, not as ~16 MB of raw int16.
+    assert os.path.getsize(path) < len(rgba) + collision.distance_index.nbytes // 10
+
+
+@pytest.fixture
+def compiled(tmp_path, monkeypatch):
+    """Level 1 compiled into tmp_path from one source SVG older than it."""
+    source = tmp_path / "Level1.svg"
+    source.write_text("<svg/>")
+    os.utime(source, (0, 0))
+    monkeypatch.setattr(levelfile, "compiled_path", lambda n: str(tmp_path / f"Level{n}.lvl"))
+    monkeypatch.setattr(levelfile, "source_paths", lambda n: [str(source)])
+
+    def compile(width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        collision = maps.build(width=width, height=height)
+        levelfile.write(levelfile.compiled_path(1), width, height, {}, collision)
+    return compile
+
+
+def test_is_fresh_for_the_current_build(compiled):
+    assert not levelfile.is_fresh(1)
+    compiled()
+    assert levelfile.is_fresh(1)
+
+
+def test_renderer_version_change_makes_it_stale(compiled, monkeypatch):
+    compiled()
+    monkeypatch.setattr(levelfile, "RENDERER_VERSION", levelfile.RENDERER_VERSION + 1)
+    assert not levelfile.is_fresh(1)
+    assert levelfile.load(1) is None
+
+
+def test_screen_size_change_makes_it_stale(compiled):
+    compiled(width=SCREEN_WIDTH // 2, height=SCREEN_HEIGHT // 2)
+    assert not levelfile.is_fresh(1)
@@ -0,0 +1,37 @@
+# fading intro text: only the glyph area is blended onto the screen
+import numpy as np
+import pygame
+from assets import AssetRegistry
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from text import IntroText
+
+GLYPHS = pygame.Rect(700, 120, 380, 610)
+
+
+def rasterised_text(path, width=None, height=None, scale_mode="contain"):
+    """A transparent full-screen raster with opaque text in GLYPHS."""
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+    surface.fill((255, 74, 36, 255), GLYPHS.inflate(-40, -40))
+    surface.fill((255, 255, 255, 128), (GLYPHS.left, GLYPHS.top, 1, 1))
+    surface.fill((255, 255, 255, 1), (GLYPHS.right - 1, GLYPHS.bottom - 1, 1, 1))
+    return surface
+
+
+def test_intro_text_fades_only_its_glyph_area(monkeypatch):
+    registry = AssetRegistry()
+    monkeypatch.setattr(registry, "surface", rasterised_text)
+    monkeypatch.setattr("text.registry", registry)
+    intro = IntroText("Text.svg")
+    assert intro.rect == GLYPHS
+
+    screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    screen.fill((20, 30, 40))
+    intro.update(2.5)
+    assert intro.draw(screen) == GLYPHS
+
+    pixels = pygame.surfarray.array3d(screen)
+    outside = np.ones(pixels.shape[:2], dtype=bool)
+    outside[GLYPHS.left:GLYPHS.right, GLYPHS.top:GLYPHS.bottom] = False
+    assert (pixels[outside] == (20, 30, 40)).all()
+    # Half faded: the text is blended in, not drawn opaque.
+    assert tuple(pixels[GLYPHS.centerx, GLYPHS.centery]) not in ((20, 30, 40), (255, 74, 36))
@@ -0,0 +1,41 @@
+# particle drawing: the packed-pixel blend against a per-channel reference
+import numpy as np
+import pygame
+import pytest
+from particles import ParticleSystem
+
+
+def blended(before, color, fade):
+    """What one particle leaves on a pixel: each channel moved fade/128 of the way."""
+    before = before.astype(np.int16)
+    return (before + (((np.array(color, dtype=np.int16) - before) * fade) >> 7)).astype(np.uint8)
+
+
+@pytest.mark.parametrize("padded", [False, True])
+@pytest.mark.parametrize("size", [1, 2])
+def test_draw_blends_each_channel_towards_the_particle_colour(padded, size):
+    surface = pygame.Surface((200 if padded else 120, 80), 0, 32)
+    if padded:
+        # A subsurface's rows are not contiguous, which takes the pixels3d path.
+        surface = surface.subsurface((0, 0, 120, 80))
+    rng = np.random.default_rng(4)
+    pygame.surfarray.pixels3d(surface)[:] = rng.integers(0, 256, (120, 80, 3))
+    before = pygame.surfarray.array3d(surface)
+
+    system = ParticleSystem(capacity=16, size=size, seed=0)
+    system.detail_limit = system.capacity
+    colors = [(255, 0, 0), (0, 200, 40), (12, 34, 250), (255, 255, 255)]
+    lives = [1.0, 0.5, 0.25, 0.75]
+    for i, (color, life) in enumerate(zip(colors, lives)):
+        system.emit(10 + 25 * i, 20 + 10 * i, 1, speed=(0, 0), life=(1.0, 1.0), color=color)
+        system.particles[i]["life"] = life
+    rect = system.draw(surface)
+
+    after = pygame.surfarray.array3d(surface)
+    expected = before.copy()
+    for i, (color, life) in enumerate(zip(colors, lives)):
+        x, y = 10 + 25 * i, 20 + 10 * i
+        fade = int(life * 128)
+        expected[x:x + size, y:y + size] = blended(before[x:x + size, y:y + size], color, fade)
+    assert np.array_equal(after, expected)
+    assert rect == pygame.Rect(10, 20, 75 + size, 30 + size)
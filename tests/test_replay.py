@@ -0,0 +1,83 @@
+# replays: the checked-in recording still plays back to the outcome it recorded
+import os
+from cube import Inputs
+from replay import Recorder, Replay, play_headless
+from sim import SPAWN, Simulation
+import maps
+
+COURSE = os.path.join(os.path.dirname(__file__), "replays", "course.frpl")
+
+
+def load(level_number):
+    """Levels 1 and 2 are maps.course(); there is no level 3."""
+    if level_number in (1, 2):
+        return maps.course()
+    raise OSError(f"no level {level_number}")
+
+
+def scripted_inputs(ticks=4000):
+    """Hold right, tapping jump, then stop jumping and run into the spikes."""
+    for tick in range(ticks):
+        jump = 300 < tick < 2600 and tick % 90 < 20
+        yield Inputs(tick % 700 > 650, True, jump, False)
+
+
+def record_course():
+    """Play the script the way index.py does and return what it recorded."""
+    recorder = Recorder(1)
+    level_number = 1
+    sim = Simulation(load(level_number))
+    for tick_inputs in scripted_inputs():
+        recorder.record(tick_inputs)
+        if sim.step(tick_inputs):
+            level_number += 1
+            sim.collision = load(level_number)
+            sim.cube.teleport(*SPAWN)
+            sim.cube.velocity_x = 0
+            sim.cube.velocity_y = 0
+    recorder.finish(level_number, sim.cube)
+    return recorder.replay
+
+
+def test_checked_in_replay_plays_back_to_its_outcome():
+    replay = Replay.load(COURSE)
+    assert replay.expected is not None
+    result = play_headless(replay, load=load)
+    assert result.mismatches == []
+    # The recording goes past a level change and a death, so those are covered.
+    assert result.level_number == 2
+    assert result.deaths > 0
+
+
+def test_recording_round_trips_with_its_outcome():
+    replay = record_course()
+    again = Replay.from_bytes(replay.to_bytes())
+    assert again.runs == replay.runs
+    assert again.expected == replay.expected
+    assert play_headless(again, load=load).mismatches == []
+
+
+def test_a_different_outcome_is_reported():
+    replay = Replay.load(COURSE)
+    level_number, deaths, x, y, state_hash = replay.expected
+    replay.expected = replay.expected._replace(deaths=deaths + 1, x=x + 1)
+    mismatches = play_headless(replay, load=load).mismatches
+    assert len(mismatches) == 2
+    assert mismatches[0].startswith("deaths:")
+    assert mismatches[1].startswith("x:")
+
+
+def test_replays_without_an_outcome_still_load():
+    replay = Replay(1, runs=[[2, 100]])
+    data = replay.to_bytes()
+    assert data[4] == 1  # written as version 1
+    loaded = Replay.from_bytes(data)
+    assert loaded.expected is None
+    assert play_headless(loaded, load=load).mismatches == []
+
+
+if __name__ == "__main__":
+    # python tests/test_replay.py re-records COURSE after an intended physics change.
+    os.makedirs(os.path.dirname(COURSE), exist_ok=True)
+    record_course().save(COURSE)
+    print(f"wrote {COURSE}")
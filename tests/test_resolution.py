@@ -0,0 +1,31 @@
+# dynamic resolution: stepping down under load and the back-off on stepping up
+from resolution import ResolutionScaler
+
+WINDOW = 30
+SLOW, FAST = 0.02, 0.001  # against a 10 ms budget
+
+
+def frames_until(scaler, frame_time, level):
+    """Record `frame_time` until the scaler reaches `level`; returns the count."""
+    for frames in range(1, 20 * WINDOW):
+        scaler.record(frame_time)
+        if scaler.level == level:
+            return frames
+    raise AssertionError(f"never reached level {level}")
+
+
+def test_failed_step_up_doubles_the_wait_and_a_held_one_resets_it():
+    scaler = ResolutionScaler(target_fps=100, window=WINDOW)
+    assert frames_until(scaler, SLOW, 1) == WINDOW
+    assert frames_until(scaler, FAST, 0) == WINDOW
+
+    # The step up doesn't hold: the next try waits twice as long.
+    assert frames_until(scaler, SLOW, 1) == WINDOW
+    assert frames_until(scaler, FAST, 0) == 2 * WINDOW
+
+    # This one holds for a whole window, so the wait is back to one window.
+    for _ in range(WINDOW):
+        scaler.record(FAST)
+    assert scaler.level == 0
+    frames_until(scaler, SLOW, 1)
+    assert frames_until(scaler, FAST, 0) == WINDOW
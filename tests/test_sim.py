@@ -0,0 +1,69 @@
+# headless physics core: falling, dying and finishing against synthetic maps
+import numpy as np
+from constants import SCREEN_WIDTH
+from cube import Inputs
+from sim import Simulation
+from collision import HAZARD
+import maps
+
+HOLD_RIGHT = Inputs(False, True, False, False)
+
+
+def test_spawn_falls_and_lands_on_the_floor():
+    sim = Simulation(maps.flat())
+    assert sim.cube.y == 0
+    for _ in range(400):
+        assert not sim.step()
+    cube = sim.cube
+    # Collision works on the truncated rect, so the box rests flush on the floor.
+    assert cube.rect().bottom == maps.FLOOR_Y
+    assert sim.collision.sense(cube.rect()).ground
+    assert not cube.jumping
+    for _ in range(100):
+        sim.step()
+        assert cube.rect().bottom == maps.FLOOR_Y
+    assert cube.deaths == 0
+
+
+def test_spikes_kill_and_reset_the_position():
+    sim = Simulation(maps.flat(hazard=[(0, maps.FLOOR_Y - 10, SCREEN_WIDTH, maps.FLOOR_Y)]))
+    for _ in range(400):
+        sim.step()
+        if sim.cube.deaths:
+            break
+    cube = sim.cube
+    assert cube.deaths == 1
+    # Respawned at (0, 500); gravity has acted for the rest of that tick only.
+    assert cube.x == 0
+    assert 500 <= cube.y < 501
+    assert cube.velocity_x == 0
+
+
+def test_spikes_added_under_a_resting_cube_kill_it():
+    sim = Simulation(maps.flat())
+    for _ in range(400):
+        sim.step()
+    assert sim.cube.deaths == 0
+    # The cube is at rest, so its rect (and the contacts sensed for it) is
+    # unchanged; replacing the layer must still be noticed.
+    hazard = np.zeros((sim.collision.height, sim.collision.width), dtype=bool)
+    hazard[maps.FLOOR_Y - 10:maps.FLOOR_Y, :] = True
+    sim.collision.set_layer(HAZARD, hazard)
+    sim.step()
+    assert sim.cube.deaths == 1
+
+
+def test_reaching_the_goal_returns_true():
+    sim = Simulation(maps.flat(goal=[(1800, 0, SCREEN_WIDTH, maps.FLOOR_Y)]))
+    goal_tick = sim.run(HOLD_RIGHT for _ in range(2000))
+    assert goal_tick is not None
+    assert sim.cube.x + sim.cube.size >= 1800
+    # The goal is reported on every tick the cube overlaps it.
+    assert sim.step(HOLD_RIGHT)
+
+
+def test_without_a_goal_layer_the_right_edge_is_the_goal():
+    sim = Simulation(maps.flat())
+    goal_tick = sim.run(HOLD_RIGHT for _ in range(2000))
+    assert goal_tick is not None
+    assert sim.cube.x + sim.cube.size >= SCREEN_WIDTH - 1
@@ -1,25 +1,35 @@
-import pygame
-from utils import svg_to_surface
+from assets import registry, surface_bytes
 from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from overlay import FadeOverlay
+
+
+def _glyphs(svg_path):
+    """The rasterised text cropped to its non-transparent pixels, and where
+    that crop sits on screen."""
+    surface = registry.surface(svg_path, SCREEN_WIDTH, SCREEN_HEIGHT)
+    bounds = surface.get_bounding_rect()
+    return surface.subsurface(bounds).copy(), bounds
 
 
 class IntroText:
     def __init__(self, svg_path):
-        self.surface = svg_to_surface(
-            svg_path,
-            SCREEN_WIDTH,
-            SCREEN_HEIGHT
+        # Only the glyph area is faded and blitted, not the whole screen.
+        self.surface, self.rect = registry.get(
+            ("intro_text", svg_path, SCREEN_WIDTH, SCREEN_HEIGHT),
+            lambda: _glyphs(svg_path),
+            lambda entry: surface_bytes(entry[0]),
         )
-        self.alpha = 255
-        self.fade_speed = 255 / 5  # fade out over 5 seconds
+        # fade out over 5 seconds
+        self.fade = FadeOverlay(self.surface, duration=5, start_alpha=255, end_alpha=0,
+                                pos=self.rect.topleft, crop=False)
+
+    @property
+    def alpha(self):
+        return self.fade.alpha
 
     def update(self, dt):
-        if self.alpha > 0:
-            self.alpha -= self.fade_speed * dt
-            self.alpha = max(0, self.alpha)
+        self.fade.update(dt)
 
     def draw(self, screen):
-        if self.surface:
-            temp = self.surface.copy()
-            temp.set_alpha(int(self.alpha))
-            screen.blit(temp, (0, 0))
\ No newline at end of file
+        """Draw the fading text; returns the screen rect touched, or None once faded out."""
+        return self.fade.draw(screen)
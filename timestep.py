@@ -0,0 +1,41 @@
+# fixed-timestep scheduler: variable frame times in, fixed physics ticks out
+from constants import PHYSICS_TICK_RATE, MAX_PHYSICS_STEPS
+
+
+class FixedTimestep:
+    """Accumulates frame time and hands out whole physics ticks.
+
+    Physics always advances by `dt`, so results don't depend on frame
+    rate. At most `max_steps` ticks run per frame; after a long stall the
+    backlog is dropped instead of being replayed, which bounds worst-case
+    frame cost. `alpha` is how far the renderer is between the last two
+    physics states.
+    """
+
+    def __init__(self, tick_rate=PHYSICS_TICK_RATE, max_steps=MAX_PHYSICS_STEPS):
+        self.dt = 1.0 / tick_rate
+        self.max_steps = max_steps
+        self.accumulator = 0.0
+
+    def advance(self, frame_time, max_steps=None):
+        """Add `frame_time` seconds and return how many ticks to run now.
+
+        `max_steps` overrides the catch-up cap for this frame (fast-forward).
+        """
+        if max_steps is None:
+            max_steps = self.max_steps
+        self.accumulator += frame_time
+        steps = int(self.accumulator / self.dt)
+        if steps > max_steps:
+            steps = max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator -= steps * self.dt
+        return steps
+
+    @property
+    def alpha(self):
+        return min(1.0, self.accumulator / self.dt)
+
+    def reset(self):
+        self.accumulator = 0.0
@@ -0,0 +1,49 @@
+# fixed-size ring buffer of recent cube positions
+import numpy as np
+
+
+class TrailBuffer:
+    """The last `capacity` integer positions, oldest first, in a numpy array.
+
+    Appending overwrites the oldest sample in place, so it is O(1) however
+    long the trail is, and positions() hands the renderer one array instead
+    of a list of tuples.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(0, int(capacity))
+        self._xy = np.zeros((max(1, self.capacity), 2), dtype=np.int32)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(map(tuple, self.positions().tolist()))
+
+    def append(self, x, y):
+        if self.capacity == 0:
+            return
+        self._xy[self._next] = (int(x), int(y))
+        self._next = (self._next + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+    def resize(self, capacity):
+        """Change the capacity, keeping the newest samples."""
+        kept = self.positions()[-capacity:] if capacity > 0 else self.positions()[:0]
+        self.__init__(capacity)
+        self._xy[:len(kept)] = kept
+        self._count = len(kept)
+        self._next = len(kept) % max(1, self.capacity)
+
+    def positions(self):
+        """Return an (n, 2) int32 array of positions, oldest first."""
+        if self._count < self.capacity:
+            return self._xy[:self._count]
+        return np.concatenate((self._xy[self._next:], self._xy[:self._next]))
@@ -1,113 +1,110 @@
-import io
-import cairosvg
-from PIL import Image
+import re
+import xml.etree.ElementTree as ET
 import pygame
+import raster_cache
 from constants import SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_Y, GROUND_HEIGHT
 
 
+def rasterize_svg(svg_path, width=None, height=None, scale_mode='contain'):
+    """Return ``(rgba_buffer, (w, h))`` for an SVG, using the disk cache when possible.
+
+    cairosvg is only imported on a cache miss, so warm starts never load it.
+    """
+    key = None
+    if raster_cache.enabled:
+        key = raster_cache.cache_key(svg_path, width, height, scale_mode)
+        cached = raster_cache.load(key)
+        if cached is not None:
+            return cached
+
+    from svg_raster import rasterize_svg as _rasterize
+    data, size = _rasterize(svg_path, width, height, scale_mode)
+    if key is not None:
+        raster_cache.store(key, data, size)
+    return data, size
+
+
 def svg_to_surface(svg_path, width=None, height=None, scale_mode='contain'):
     """Render an SVG file to a Pygame Surface while preserving aspect ratio.
 
     If `width` and/or `height` are provided this function will scale the SVG
     so it fits inside the requested box while keeping its aspect ratio.
     """
-    # Try to read intrinsic SVG size from viewBox or width/height attributes
-    def _intrinsic_size(path):
-        try:
-            import xml.etree.ElementTree as ET
-            tree = ET.parse(path)
-            root = tree.getroot()
-        except Exception:
-            return None
+    data, size = rasterize_svg(svg_path, width, height, scale_mode)
+    surface = pygame.image.frombuffer(data, size, 'RGBA')
+    # Without a display mode (headless simulation) there is no pixel format
+    # to convert to; the RGBA surface is still fine for masks and blits.
+    if pygame.display.get_surface() is None:
+        return surface
+    return surface.convert_alpha()
+
+
+def region_cache_key(svg_path, output_size, region):
+    return raster_cache.cache_key(svg_path, *output_size, "region %d,%d,%d,%d" % tuple(region))
 
-        viewbox = root.get('viewBox') or root.get('viewbox')
-        if viewbox:
-            parts = viewbox.strip().split()
-            if len(parts) == 4:
-                try:
-                    w = float(parts[2])
-                    h = float(parts[3])
-                    return w, h
-                except Exception:
-                    pass
-
-        w_attr = root.get('width')
-        h_attr = root.get('height')
-        def _parse_dim(val):
-            if not val:
-                return None
-            import re
-            m = re.match(r'([0-9.+-eE]+)', val)
-            if m:
-                try:
-                    return float(m.group(1))
-                except Exception:
-                    return None
-            return None
 
-        w = _parse_dim(w_attr)
-        h = _parse_dim(h_attr)
-        if w and h:
-            return w, h
-        return None
-
-    intrinsic = _intrinsic_size(svg_path)
-    out_w, out_h = None, None
-    if intrinsic:
-        iw, ih = intrinsic
-        if width and height:
-            if scale_mode == 'contain':
-                # scale to fit inside box
-                scale = min(width / iw, height / ih)
-            elif scale_mode == 'cover':
-                # scale to cover the box (may overflow), we'll crop after rasterising
-                scale = max(width / iw, height / ih)
-            else:
-                # 'fill' or unknown: stretch to exact dimensions
-                scale = None
-
-            if scale is None:
-                out_w = width
-                out_h = height
-            else:
-                out_w = int(round(iw * scale))
-                out_h = int(round(ih * scale))
-        elif width:
-            scale = width / iw
-            out_w = int(round(iw * scale))
-            out_h = int(round(ih * scale))
-        elif height:
-            scale = height / ih
-            out_w = int(round(iw * scale))
-            out_h = int(round(ih * scale))
-    else:
-        out_w = width
-        out_h = height
-
-    png_bytes = cairosvg.svg2png(url=svg_path,
-                                output_width=out_w,
-                                output_height=out_h)
-
-    buf = io.BytesIO(png_bytes)
-    buf.seek(0)
-    img = Image.open(buf).convert("RGBA")
-    if width and height and scale_mode == 'cover':
-        iw, ih = img.size
-        crop_left = 0
-        crop_top = 0
-        crop_right = iw
-        crop_bottom = ih
-        if iw > width:
-            # center horizontally
-            crop_left = (iw - width) // 2
-            crop_right = crop_left + width
-        if ih > height:
-            # bottom-align vertically
-            crop_top = ih - height
-            crop_bottom = ih
-        if (crop_left, crop_top, crop_right, crop_bottom) != (0, 0, iw, ih):
-            img = img.crop((crop_left, crop_top, crop_right, crop_bottom))
-    data = img.tobytes()
-    size = img.size
+def rasterize_svg_region(svg_path, output_size, region):
+    """Return ``(rgba_buffer, (w, h))`` for `region` (x, y, w, h) of an SVG
+    stretched to `output_size`, using the disk cache when possible."""
+    key = None
+    if raster_cache.enabled:
+        key = region_cache_key(svg_path, output_size, region)
+        cached = raster_cache.load(key)
+        if cached is not None:
+            return cached
+
+    from svg_raster import rasterize_region
+    data, size = rasterize_region(svg_path, output_size, tuple(region))
+    if key is not None:
+        raster_cache.store(key, data, size)
+    return data, size
+
+
+def svg_region_to_surface(svg_path, output_size, region):
+    """Render one region of an SVG stretched to `output_size` as a Surface."""
+    data, size = rasterize_svg_region(svg_path, output_size, region)
     surface = pygame.image.frombuffer(data, size, 'RGBA')
+    if pygame.display.get_surface() is None:
+        return surface
     return surface.convert_alpha()
+
+
+def intrinsic_size(root):
+    """Intrinsic ``(width, height)`` of an SVG from its root element's viewBox
+    or width/height attributes (anything with .get()), or None if it has neither."""
+    viewbox = root.get('viewBox') or root.get('viewbox')
+    if viewbox:
+        parts = viewbox.replace(',', ' ').split()
+        if len(parts) == 4:
+            try:
+                return float(parts[2]), float(parts[3])
+            except ValueError:
+                pass
+
+    def dimension(value):
+        match = re.match(r'([0-9.+-eE]+)', value or '')
+        try:
+            return float(match.group(1)) if match else None
+        except ValueError:
+            return None
+
+    w = dimension(root.get('width'))
+    h = dimension(root.get('height'))
+    if w and h:
+        return w, h
+    return None
+
+
+def svg_size(svg_path):
+    """intrinsic_size() of an SVG file, reading only its root element, so
+    without loading the rasteriser."""
+    with open(svg_path, 'rb') as f:
+        for _, root in ET.iterparse(f, events=("start",)):
+            break
+    return intrinsic_size(root)
+
+    w = dimension(root.get('width'))
+    h = dimension(root.get('height'))
+    if w and h:
+        return w, h
+    return None